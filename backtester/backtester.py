@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import sys
 import os
+import copy
+from itertools import product
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -9,73 +11,210 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import from the same directory
 from portfolio import Portfolio
 from performance import PerformanceMetrics
+from walk_forward import WalkForwardOptimizer
+from parameter_search import SuccessiveHalvingSearch
+from result_cache import ResultCache
+from instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from sizing import bar_range
+from worker_pool import map_shared
+
+EXECUTION_MODES = ('vectorized', 'loop')
+
+def _evaluate_in_worker(backtester, params):
+    """Evaluate one parameter combination in a worker process"""
+    if not backtester.instrumentation.enabled:
+        return backtester.evaluate_parameters(params)
+    
+    # Send this task's stage totals back for the parent to merge
+    backtester.instrumentation = Instrumentation()
+    return backtester.evaluate_parameters(params), backtester.instrumentation.stages
 
 class Backtester:
-    def __init__(self, data, strategy, initial_capital=10000.0, commission=0.001):
+    def __init__(self, data, strategy, initial_capital=10000.0, commission=0.001, execution_mode='vectorized',
+                 cache=None, instrumentation=None, sizing=None, fills=None):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        
         self.data = data
         self.strategy = strategy
         self.initial_capital = initial_capital
         self.commission = commission
+        self.execution_mode = execution_mode
+        self.sizing = sizing
+        self.fills = fills
+        self.cache = ResultCache() if cache is True else cache
+        if instrumentation is True:
+            instrumentation = Instrumentation()
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
         self.portfolio = Portfolio(initial_capital)
         self.performance = None
         
-    def run_backtest(self):
-        """Run the backtest simulation"""
-        # Generate trading signals
-        signals = self.strategy.generate_signals()
+    def run_backtest(self, execution_mode=None):
+        """Run the backtest simulation
         
-        # Initialize portfolio
-        self.portfolio.initialize_portfolio(signals.index)
+        'vectorized' computes the whole portfolio in one NumPy pass, 'loop'
+        steps through the bars one at a time and is kept as a reference.
+        With a sizing or fill model (see sizing) the orders go through
+        Portfolio.execute_orders instead, compiled when numba is installed.
+        """
+        with self.instrumentation.capture():
+            return self._run_backtest(execution_mode)
+    
+    def _run_backtest(self, execution_mode):
+        instrumentation = self.instrumentation
+        key = None
+        if self.cache is not None:
+            with instrumentation.stage('cache_lookup'):
+                # Signals come from the strategy's data, fills also read the bars of self.data
+                execution = (self.sizing, self.fills)
+                if (self.sizing is not None or self.fills is not None) and self.data is not self.strategy.data:
+                    execution += (ResultCache.data_digest(self.data),)
+                key = ResultCache.key(self.strategy.data, self.strategy, self.initial_capital, self.commission,
+                                      execution=execution)
+                cached = self.cache.get(key)
+            if cached is not None:
+                return self._restore(cached)
         
-        # Execute trades based on signals
-        for date, row in signals.iterrows():
-            price = row['price']
-            signal = row['positions']
-            
-            # Update portfolio
-            self.portfolio.update_portfolio(date, price, signal)
+        signals, self.performance = self._simulate(self.strategy, self.portfolio, execution_mode)
         
-        # Calculate returns
-        portfolio_values = self.portfolio.holdings['total']
-        returns = portfolio_values.pct_change().fillna(0)
+        if key is not None:
+            with instrumentation.stage('cache_store'):
+                self.cache.put(key, {
+                    'signals': signals,
+                    'holdings': self.portfolio.holdings,
+                    'trades': self.portfolio.trades,
+                    'metrics': self.performance.calculate_metrics()
+                })
         
-        # Calculate performance metrics
+        return {
+            'signals': signals,
+            'portfolio': self.portfolio,
+            'performance': self.performance
+        }
+    
+    def _restore(self, cached):
+        """Rebuild the results of run_backtest from a cache entry"""
+        self.strategy.signals = cached['signals']
+        self.portfolio.restore(cached['holdings'], cached['trades'])
+        returns = cached['holdings']['total'].pct_change().fillna(0)
         self.performance = PerformanceMetrics(returns)
         
         return {
-            'signals': signals,
+            'signals': cached['signals'],
             'portfolio': self.portfolio,
             'performance': self.performance
         }
     
+    def _simulate(self, strategy, portfolio, execution_mode=None):
+        """Run a strategy through a portfolio and return signals and performance"""
+        mode = execution_mode or self.execution_mode
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        
+        instrumentation = self.instrumentation
+        bars = len(self.data)
+        
+        # Generate trading signals
+        with instrumentation.stage('signals', bars):
+            signals = strategy.generate_signals()
+        
+        with instrumentation.stage(f'execution_{mode}', bars) as stage:
+            # The first bar has no previous signal to diff against
+            orders = signals['positions'].fillna(0.0)
+            
+            # Initialize portfolio
+            portfolio.initialize_portfolio(signals.index)
+            
+            # Execute trades based on signals
+            if self.sizing is not None or self.fills is not None:
+                open_, high, low = bar_range(self.data, signals['price'])
+                portfolio.execute_orders(
+                    signals.index, signals['price'].values, orders.values, high, low, open_,
+                    self.sizing, self.fills, self.commission,
+                    backend='python' if mode == 'loop' else 'auto'
+                )
+            elif mode == 'vectorized':
+                portfolio.execute_vectorized(signals.index, signals['price'].values, orders.values)
+            else:
+                for date, price, signal in zip(signals.index, signals['price'], orders):
+                    # Update portfolio
+                    portfolio.update_portfolio(date, price, signal)
+            stage.trades = portfolio.ledger.trade_count
+        
+        # Calculate returns
+        with instrumentation.stage('returns', bars):
+            portfolio_values = portfolio.holdings['total']
+            returns = portfolio_values.pct_change().fillna(0)
+        
+        # Calculate performance metrics
+        return signals, PerformanceMetrics(returns)
+    
+    def evaluate_parameters(self, params):
+        """Backtest one parameter combination without touching the shared strategy"""
+        strategy = copy.copy(self.strategy)
+        strategy.parameters = {**self.strategy.parameters, **params}
+        strategy.signals = None
+        
+        _, performance = self._simulate(strategy, Portfolio(self.initial_capital))
+        with self.instrumentation.stage('metrics', len(self.data)):
+            return performance.calculate_metrics()
+    
     def get_performance_report(self):
         """Get performance report"""
         if self.performance is None:
             self.run_backtest()
         
-        return self.performance.generate_report()
+        with self.instrumentation.stage('report', len(self.data)):
+            return self.performance.generate_report()
     
-    def optimize_parameters(self, parameter_grid):
-        """Optimize strategy parameters using grid search"""
+    def optimize_parameters(self, parameter_grid, n_jobs=1, chunksize=None, method='grid', **search_options):
+        """Optimize strategy parameters using grid search
+        
+        With n_jobs > 1 (or None for all cores) the combinations are spread
+        over a process pool. Each worker receives the backtester, and with it
+        the price data, once rather than with every task, and results are
+        collected in grid order.
+        
+        method='halving' runs a successive-halving search instead (see
+        SuccessiveHalvingSearch for search_options), which drops weak
+        window pairs on short slices of history before scoring the rest
+        on the full series.
+        """
+        with self.instrumentation.capture():
+            return self._optimize_parameters(parameter_grid, n_jobs, chunksize, method, **search_options)
+    
+    def _optimize_parameters(self, parameter_grid, n_jobs, chunksize, method, **search_options):
+        if method == 'halving':
+            with self.instrumentation.stage('halving_search') as stage:
+                search = SuccessiveHalvingSearch(
+                    self.strategy, parameter_grid, initial_capital=self.initial_capital, **search_options
+                )
+                results = search.run()
+                stage.bars = results['bar_evaluations']
+            return results
+        if method != 'grid':
+            raise ValueError(f"Unknown optimization method: {method}")
+        
         best_params = None
         best_performance = -float('inf')
         results = []
         
         # Generate all parameter combinations
-        from itertools import product
         param_names = list(parameter_grid.keys())
         param_values = list(parameter_grid.values())
+        combinations = [dict(zip(param_names, combination)) for combination in product(*param_values)]
         
-        for combination in product(*param_values):
-            params = dict(zip(param_names, combination))
-            
-            # Update strategy with new parameters
-            self.strategy.parameters.update(params)
-            
-            # Run backtest
-            self.run_backtest()
-            performance = self.performance.calculate_metrics()
-            
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, len(combinations))
+        
+        with self.instrumentation.stage('optimize', len(self.data) * len(combinations)):
+            if n_jobs <= 1:
+                performances = [self.evaluate_parameters(params) for params in combinations]
+            else:
+                performances = self._evaluate_in_pool(combinations, n_jobs, chunksize)
+        
+        for params, performance in zip(combinations, performances):
             # Use Sharpe ratio as optimization criterion
             performance_score = performance['sharpe_ratio']
             
@@ -94,6 +233,31 @@ class Backtester:
             'best_performance': best_performance,
             'all_results': results
         }
+    
+    def walk_forward(self, parameter_grid, in_sample, out_of_sample, anchored=False, n_jobs=1):
+        """Walk-forward optimization of the strategy's moving average windows"""
+        optimizer = WalkForwardOptimizer(
+            self.strategy, parameter_grid, in_sample, out_of_sample,
+            anchored=anchored, initial_capital=self.initial_capital, n_jobs=n_jobs
+        )
+        return optimizer.run()
+    
+    def _evaluate_in_pool(self, combinations, n_jobs, chunksize=None):
+        """Evaluate parameter combinations in a process pool, preserving order"""
+        if chunksize is None:
+            chunksize = max(1, len(combinations) // (4 * n_jobs))
+        
+        outcomes = map_shared(_evaluate_in_worker, self, combinations, n_jobs, chunksize)
+        
+        if not self.instrumentation.enabled:
+            return outcomes
+        
+        # Fold the workers' stage totals into this process's instrumentation
+        performances = []
+        for performance, stages in outcomes:
+            self.instrumentation.merge(stages)
+            performances.append(performance)
+        return performances
 
 # Test the backtester
 if __name__ == "__main__":
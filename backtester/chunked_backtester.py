@@ -0,0 +1,161 @@
+import pandas as pd
+import numpy as np
+import argparse
+import copy
+import sys
+import os
+import time
+import tracemalloc
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INITIAL_CAPITAL, COMMISSION, CHUNK_SIZE
+from data.data_loader import DataLoader
+
+# Import from the same directory
+from kernels import execute_fixed
+from portfolio import TRADE_COLUMNS
+from performance import StreamingPerformanceMetrics
+
+class ChunkedBacktester:
+    """Backtest over price data streamed in fixed-size blocks, for histories larger than memory
+    
+    Each block is run through a copy of the strategy together with the last
+    `lookback` bars of the previous blocks, so rolling windows and the
+    order at the block boundary see the same prices as in one in-memory
+    run. Cash and shares carry over between blocks, and returns feed a
+    StreamingPerformanceMetrics, so memory is bounded by the block size.
+    Holdings and trades can be appended to CSV files as blocks complete.
+    
+    Trading follows Backtester's default vectorized execution: every order
+    trades position_size shares.
+    """
+    
+    def __init__(self, strategy, initial_capital=INITIAL_CAPITAL, commission=COMMISSION, position_size=1.0,
+                 lookback=None, backend='auto'):
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.position_size = position_size
+        self.backend = backend
+        
+        # Enough history for the longest window of the strategy
+        if lookback is None:
+            windows = [value for name, value in strategy.parameters.items() if name.endswith('window')]
+            lookback = max(windows, default=0)
+        self.lookback = lookback
+        self.reset()
+    
+    def reset(self):
+        """Start again from cash only"""
+        self.cash = self.initial_capital
+        self.shares = 0.0
+        self.total = self.initial_capital
+        self.bars = 0
+        self.chunks = 0
+        self.history = None
+        self.trades = []
+        self.performance = StreamingPerformanceMetrics()
+    
+    def process_chunk(self, chunk):
+        """Backtest the next block of bars and return its holdings (cash, holdings, total)"""
+        history = chunk if self.history is None else pd.concat([self.history, chunk])
+        
+        strategy = copy.copy(self.strategy)
+        strategy.data = history
+        strategy.signals = None
+        signals = strategy.generate_signals().iloc[len(history) - len(chunk):]
+        
+        prices = signals['price'].to_numpy(dtype=float)
+        orders = signals['positions'].fillna(0.0).to_numpy()
+        cash, shares, _, trades = execute_fixed(
+            prices, orders, self.cash, self.position_size, self.commission, self.backend
+        )
+        shares += self.shares
+        total = shares * prices + cash
+        
+        # The first return of a block is measured against the last total of the previous one
+        returns = np.empty(len(total))
+        if len(total):
+            returns[0] = total[0] / self.total - 1 if self.bars else 0.0
+            returns[1:] = total[1:] / total[:-1] - 1
+        self.performance.update(returns)
+        
+        self.trades.append(pd.DataFrame({
+            'date': chunk.index[trades['row']],
+            'type': np.where(trades['side'] > 0, 'BUY', 'SELL'),
+            'price': trades['price'],
+            'shares': trades['shares'],
+            'value': trades['value'],
+            'cash_after': trades['cash_after']
+        }, columns=TRADE_COLUMNS))
+        
+        if len(total):
+            self.cash, self.shares, self.total = cash[-1], shares[-1], total[-1]
+        self.bars += len(chunk)
+        self.chunks += 1
+        self.history = history.iloc[-self.lookback:].copy() if self.lookback else None
+        
+        return pd.DataFrame({'cash': cash, 'holdings': shares * prices, 'total': total}, index=chunk.index)
+    
+    def run(self, chunks, holdings_path=None, trades_path=None):
+        """Backtest an iterable of consecutive price blocks
+        
+        With holdings_path / trades_path set, the holdings and trades of
+        every block are appended to those CSV files and not kept in memory.
+        Returns the trades (None when written to a file), the performance
+        accumulator and the number of bars processed.
+        """
+        self.reset()
+        for chunk in chunks:
+            holdings = self.process_chunk(chunk)
+            if holdings_path:
+                holdings.to_csv(holdings_path, mode='a' if self.chunks > 1 else 'w', header=self.chunks == 1)
+            if trades_path:
+                self.trades.pop().to_csv(trades_path, mode='a' if self.chunks > 1 else 'w',
+                                         header=self.chunks == 1, index=False)
+        
+        trades = None
+        if not trades_path:
+            trades = pd.concat(self.trades, ignore_index=True) if self.trades else pd.DataFrame(columns=TRADE_COLUMNS)
+        
+        return {
+            'trades': trades,
+            'performance': self.performance,
+            'bars': self.bars
+        }
+    
+    def run_csv(self, path, chunk_size=CHUNK_SIZE, **outputs):
+        """Backtest a price CSV read chunk_size rows at a time"""
+        return self.run(DataLoader.iter_csv(path, chunk_size), **outputs)
+
+# Backtest a large price file from the command line
+if __name__ == "__main__":
+    from strategies.moving_average_crossover import MovingAverageCrossover
+    from config import SHORT_WINDOW, LONG_WINDOW, DATA_PATH
+    
+    parser = argparse.ArgumentParser(description="Moving average crossover backtest of a price file in fixed-size blocks")
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help="price CSV with a Close column")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="bars per block")
+    parser.add_argument('--short', type=int, default=SHORT_WINDOW, help="short moving average window")
+    parser.add_argument('--long', type=int, default=LONG_WINDOW, help="long moving average window")
+    parser.add_argument('--holdings', help="append the holdings of every bar to this CSV file")
+    parser.add_argument('--trades', help="append the trades to this CSV file")
+    args = parser.parse_args()
+    
+    backtester = ChunkedBacktester(MovingAverageCrossover(None, args.short, args.long))
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = backtester.run_csv(args.path, args.chunk_size, holdings_path=args.holdings, trades_path=args.trades)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    print(f"{results['bars']:,} bars in {backtester.chunks} blocks, {seconds:.2f}s, "
+          f"{peak / 2 ** 20:.1f} MB peak traced memory")
+    print(results['performance'].generate_report())
+    if results['trades'] is not None:
+        print(f"\n{len(results['trades'])} trades, last ones:")
+        print(results['trades'].tail())
\ No newline at end of file
@@ -0,0 +1,216 @@
+import pandas as pd
+import numpy as np
+import cProfile
+import io
+import pstats
+import sys
+import os
+import time
+import tracemalloc
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STAGE_COLUMNS = ['calls', 'seconds', 'bars', 'trades', 'net_blocks']
+
+class Stage:
+    """Timer for one pass through a named stage
+    
+    Used as a context manager; bars and trades may be set inside the block.
+    net_blocks is the net change in live Python memory blocks
+    (sys.getallocatedblocks()), not a count of allocations.
+    """
+    
+    def __init__(self, stats, name, bars=0):
+        self.stats = stats
+        self.name = name
+        self.bars = bars
+        self.trades = 0
+    
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        self.stats.add(self.name, seconds=seconds, bars=self.bars, trades=self.trades,
+                       net_blocks=sys.getallocatedblocks() - self.blocks)
+        return False
+
+class _NullStage:
+    """Stage stand-in that records nothing
+    
+    A new one is handed out per stage, so setting bars or trades on it
+    never leaks into another run.
+    """
+    
+    bars = 0
+    trades = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+class NullInstrumentation:
+    """Disabled instrumentation, every hook is a no-op"""
+    
+    enabled = False
+    
+    def stage(self, name, bars=0):
+        return _NullStage()
+    
+    def capture(self):
+        return _NullStage()
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+class Instrumentation:
+    """Opt-in timing and profiling of Backtester runs
+    
+    Every stage (signals, execution, returns, metrics, ...) accumulates its
+    call count, wall time, bars processed, trades executed and the net
+    change in allocated memory blocks (net_blocks). With profile=True the
+    latest outermost run is captured by cProfile, and with
+    trace_memory=True by tracemalloc, which adds peak memory and the top
+    allocation sites to the report. Both slow the run down noticeably, the
+    stage counters do not.
+    """
+    
+    enabled = True
+    
+    def __init__(self, profile=False, trace_memory=False):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.profiler = None
+        self.memory_peak = None
+        self.memory_snapshot = None
+        self.depth = 0
+    
+    def __getstate__(self):
+        # A profiler cannot be pickled (spawn and forkserver worker pools), and a
+        # worker only reports its own stage totals, so only the settings travel
+        return {'profile': self.profile, 'trace_memory': self.trace_memory}
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
+    
+    def stage(self, name, bars=0):
+        """Context manager timing one pass through a stage"""
+        return Stage(self, name, bars)
+    
+    def add(self, name, **counts):
+        """Accumulate counts into a stage"""
+        totals = self.stages.setdefault(name, dict.fromkeys(STAGE_COLUMNS, 0))
+        totals['calls'] += counts.pop('calls', 1)
+        for column, value in counts.items():
+            totals[column] += value
+    
+    def merge(self, stages):
+        """Add the stage totals recorded elsewhere, e.g. in a worker process"""
+        for name, totals in stages.items():
+            self.add(name, **totals)
+    
+    def capture(self):
+        """Context manager wrapping a whole run in the optional profilers
+        
+        Nested captures (optimize_parameters calling run_backtest) only
+        profile the outermost one.
+        """
+        return _Capture(self)
+    
+    def stats(self):
+        """Stage totals as a DataFrame, one row per stage in first-use order"""
+        stats = pd.DataFrame.from_dict(self.stages, orient='index', columns=STAGE_COLUMNS)
+        stats.index.name = 'stage'
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats['bars_per_sec'] = np.where(stats['seconds'] > 0, stats['bars'] / stats['seconds'], np.nan)
+        return stats
+    
+    def profile_report(self, limit=20, sort='cumulative'):
+        """Top functions of the cProfile capture"""
+        if self.profiler is None:
+            return "No cProfile capture (create Instrumentation with profile=True)"
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+    
+    def memory_report(self, limit=10):
+        """Peak traced memory and the top allocation sites of the tracemalloc capture"""
+        if self.memory_snapshot is None:
+            return "No tracemalloc capture (create Instrumentation with trace_memory=True)"
+        lines = [f"Peak traced memory: {self.memory_peak / 2 ** 20:.1f} MB"]
+        for statistic in self.memory_snapshot.statistics('lineno')[:limit]:
+            lines.append(str(statistic))
+        return "\n".join(lines)
+    
+    def report(self):
+        """Stage table, followed by the profiler captures if any"""
+        sections = [self.stats().to_string(float_format=lambda value: f"{value:,.4f}")]
+        if self.profiler is not None:
+            sections.append(self.profile_report())
+        if self.memory_snapshot is not None:
+            sections.append(self.memory_report())
+        return "\n\n".join(sections)
+    
+    def reset(self):
+        """Forget all recorded stages and captures"""
+        self.stages = {}
+        self.profiler = None
+        self.memory_peak = None
+        self.memory_snapshot = None
+
+class _Capture:
+    """Starts and stops cProfile / tracemalloc around the outermost run"""
+    
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+    
+    def __enter__(self):
+        instrumentation = self.instrumentation
+        instrumentation.depth += 1
+        if instrumentation.depth > 1:
+            return self
+        
+        if instrumentation.trace_memory:
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if instrumentation.profile:
+            instrumentation.profiler = cProfile.Profile()
+            instrumentation.profiler.enable()
+        return self
+    
+    def __exit__(self, *exc_info):
+        instrumentation = self.instrumentation
+        instrumentation.depth -= 1
+        if instrumentation.depth > 0:
+            return False
+        
+        if instrumentation.profile:
+            instrumentation.profiler.disable()
+        if instrumentation.trace_memory:
+            instrumentation.memory_peak = tracemalloc.get_traced_memory()[1]
+            instrumentation.memory_snapshot = tracemalloc.take_snapshot()
+            if self.started_tracing:
+                tracemalloc.stop()
+        return False
+
+# Test the instrumentation
+if __name__ == "__main__":
+    from backtester import Backtester
+    from data.data_loader import DataLoader
+    from strategies.moving_average_crossover import MovingAverageCrossover
+    
+    data = DataLoader().load_data()
+    instrumentation = Instrumentation(profile=True)
+    backtester = Backtester(data, MovingAverageCrossover(data), instrumentation=instrumentation)
+    
+    backtester.run_backtest()
+    backtester.optimize_parameters({'short_window': [10, 20, 50], 'long_window': [100, 150, 200]})
+    
+    print(instrumentation.report())
\ No newline at end of file
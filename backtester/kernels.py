@@ -0,0 +1,572 @@
+import pandas as pd
+import numpy as np
+import importlib.util
+import sys
+import os
+import threading
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INITIAL_CAPITAL, COMMISSION
+
+# Numba is optional, without it every kernel runs on the NumPy fallback. It is
+# only imported, and the loops compiled, the first time a numba kernel runs
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+
+# 'python' runs the uncompiled bar loops and is only meant as a reference
+BACKENDS = ('auto', 'numba', 'numpy', 'python')
+
+# Entry order types understood by execute_orders
+MARKET, LIMIT, STOP = 0, 1, 2
+
+# Record layout of a single trade in the ledger
+TRADE_DTYPE = np.dtype([
+    ('row', np.int64),
+    ('side', np.int8),
+    ('price', np.float64),
+    ('shares', np.float64),
+    ('value', np.float64),
+    ('cash_after', np.float64)
+])
+
+def trade_records(rows, sides, prices, shares, values, cash_after):
+    """Pack trade arrays into TRADE_DTYPE records"""
+    trades = np.zeros(len(rows), dtype=TRADE_DTYPE)
+    trades['row'] = rows
+    trades['side'] = sides
+    trades['price'] = prices
+    trades['shares'] = shares
+    trades['value'] = values
+    trades['cash_after'] = cash_after
+    return trades
+
+def _fixed_loop(prices, orders, initial_capital, position_size, commission):
+    """Bar-by-bar fixed-size accounting, compiled by numba when available"""
+    bars = len(prices)
+    cash = np.empty(bars)
+    shares = np.empty(bars)
+    total = np.empty(bars)
+    trade_rows = np.empty(bars, dtype=np.int64)
+    trade_count = 0
+    
+    current_cash = initial_capital
+    current_shares = 0.0
+    for i in range(bars):
+        order = orders[i]
+        if order != 0:
+            position_value = position_size * prices[i]
+            current_cash -= position_value * order + position_value * commission
+            current_shares += order * position_size
+            trade_rows[trade_count] = i
+            trade_count += 1
+        cash[i] = current_cash
+        shares[i] = current_shares
+        total[i] = current_shares * prices[i] + current_cash
+    
+    return cash, shares, total, trade_rows[:trade_count]
+
+def _all_in_loop(prices, orders, capital, commission):
+    """Bar-by-bar all-in accounting, compiled by numba when available"""
+    bars = len(prices)
+    cash = np.empty(bars)
+    shares = np.empty(bars)
+    total = np.empty(bars)
+    trade_rows = np.empty(bars, dtype=np.int64)
+    trade_shares = np.empty(bars)
+    trade_count = 0
+    
+    current_cash = capital
+    current_shares = 0.0
+    holdings = 0.0
+    for i in range(bars):
+        price = prices[i]
+        if price == price:
+            order = orders[i]
+            if order > 0:
+                quantity = capital // price
+                if quantity > 0:
+                    current_cash -= quantity * price * (1 + commission)
+                    current_shares += quantity
+                    trade_rows[trade_count] = i
+                    trade_shares[trade_count] = quantity
+                    trade_count += 1
+            elif order < 0 and current_shares > 0:
+                current_cash += current_shares * price * (1 - commission)
+                trade_rows[trade_count] = i
+                trade_shares[trade_count] = current_shares
+                trade_count += 1
+                current_shares = 0.0
+            holdings = current_shares * price
+        cash[i] = current_cash
+        shares[i] = current_shares
+        total[i] = current_cash + holdings
+    
+    return cash, shares, total, trade_rows[:trade_count], trade_shares[:trade_count]
+
+def _quantity(row, price, equity, size_shares, size_notional, size_fraction, commission, whole_shares):
+    """Shares bought at `price` under the sizing arrays, with commission inside the budget"""
+    quantity = size_shares[row] + (size_notional[row] + size_fraction[row] * equity) / (price * (1 + commission))
+    if whole_shares:
+        quantity = np.floor(quantity)
+    return quantity
+
+def _orders_loop(open_, high, low, close, orders, size_shares, size_notional, size_fraction,
+                 initial_capital, commission, slippage, entry_type, offset, valid_bars,
+                 stop_loss, take_profit, whole_shares):
+    """Bar-by-bar long-only accounting with sizing, slippage and High/Low fills
+    
+    Each bar runs three steps: protective stop-loss / take-profit exits
+    against the bar's range, fills of a pending limit or stop entry, and
+    the order at the close. Compiled by numba when available.
+    """
+    bars = len(close)
+    cash = np.empty(bars)
+    shares = np.empty(bars)
+    total = np.empty(bars)
+    trade_rows = np.empty(2 * bars, dtype=np.int64)
+    trade_sides = np.empty(2 * bars, dtype=np.int64)
+    trade_prices = np.empty(2 * bars)
+    trade_shares = np.empty(2 * bars)
+    trade_cash = np.empty(2 * bars)
+    trade_count = 0
+    
+    current_cash = initial_capital
+    held = 0.0
+    entry_price = 0.0
+    entry_row = -1
+    pending = False
+    level = 0.0
+    pending_left = 0
+    
+    for i in range(bars):
+        # Protective exits inside the bar, the stop first when both are hit
+        if held > 0 and i > entry_row:
+            exit_price = np.nan
+            if stop_loss > 0:
+                stop = entry_price * (1 - stop_loss)
+                if low[i] <= stop:
+                    exit_price = min(open_[i], stop) * (1 - slippage)
+            if exit_price != exit_price and take_profit > 0:
+                target = entry_price * (1 + take_profit)
+                if high[i] >= target:
+                    exit_price = max(open_[i], target)
+            if exit_price == exit_price:
+                current_cash += held * exit_price * (1 - commission)
+                trade_rows[trade_count] = i
+                trade_sides[trade_count] = -1
+                trade_prices[trade_count] = exit_price
+                trade_shares[trade_count] = held
+                trade_cash[trade_count] = current_cash
+                trade_count += 1
+                held = 0.0
+        
+        # Pending limit / stop entry, filled at the level or a better open
+        if pending:
+            fill = np.nan
+            if entry_type == LIMIT and low[i] <= level:
+                fill = min(open_[i], level)
+            elif entry_type == STOP and high[i] >= level:
+                fill = max(open_[i], level) * (1 + slippage)
+            if fill == fill:
+                pending = False
+                quantity = _quantity(i, fill, current_cash, size_shares, size_notional, size_fraction,
+                                     commission, whole_shares)
+                if quantity > 0:
+                    current_cash -= quantity * fill * (1 + commission)
+                    held = quantity
+                    entry_price = fill
+                    entry_row = i
+                    trade_rows[trade_count] = i
+                    trade_sides[trade_count] = 1
+                    trade_prices[trade_count] = fill
+                    trade_shares[trade_count] = quantity
+                    trade_cash[trade_count] = current_cash
+                    trade_count += 1
+            else:
+                pending_left -= 1
+                if pending_left <= 0:
+                    pending = False
+        
+        # Orders at the close
+        order = orders[i]
+        if order > 0 and held == 0 and not pending:
+            if entry_type == MARKET:
+                fill = close[i] * (1 + slippage)
+                quantity = _quantity(i, fill, current_cash, size_shares, size_notional, size_fraction,
+                                     commission, whole_shares)
+                if quantity > 0:
+                    current_cash -= quantity * fill * (1 + commission)
+                    held = quantity
+                    entry_price = fill
+                    entry_row = i
+                    trade_rows[trade_count] = i
+                    trade_sides[trade_count] = 1
+                    trade_prices[trade_count] = fill
+                    trade_shares[trade_count] = quantity
+                    trade_cash[trade_count] = current_cash
+                    trade_count += 1
+            else:
+                level = close[i] * (1 - offset) if entry_type == LIMIT else close[i] * (1 + offset)
+                pending = True
+                pending_left = valid_bars
+        elif order < 0:
+            pending = False
+            if held > 0:
+                fill = close[i] * (1 - slippage)
+                current_cash += held * fill * (1 - commission)
+                trade_rows[trade_count] = i
+                trade_sides[trade_count] = -1
+                trade_prices[trade_count] = fill
+                trade_shares[trade_count] = held
+                trade_cash[trade_count] = current_cash
+                trade_count += 1
+                held = 0.0
+        
+        cash[i] = current_cash
+        shares[i] = held
+        total[i] = held * close[i] + current_cash
+    
+    return (cash, shares, total, trade_rows[:trade_count], trade_sides[:trade_count],
+            trade_prices[:trade_count], trade_shares[:trade_count], trade_cash[:trade_count])
+
+# Compiled versions of the bar loops, filled once by _compiled_kernels
+_compiled = {}
+_compile_lock = threading.Lock()
+
+def _compiled_kernels():
+    """Import numba and wrap the bar loops on first use, compilation happens on the first call
+    
+    The wrappers are built under a lock and published all at once, so a
+    thread never sees a partly built kernel set.
+    """
+    global _quantity
+    if _compiled:
+        return _compiled
+    with _compile_lock:
+        if not _compiled:
+            import numba
+            # The order loop picks up the compiled _quantity when it is compiled
+            _quantity = numba.njit(cache=True)(_quantity)
+            _compiled.update({
+                'fixed': numba.njit(cache=True)(_fixed_loop),
+                'all_in': numba.njit(cache=True)(_all_in_loop),
+                'orders': numba.njit(cache=True)(_orders_loop)
+            })
+    return _compiled
+
+def resolve_backend(backend='auto'):
+    """Pick the kernel implementation, 'auto' prefers numba when it is installed"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend: {backend}")
+    if backend == 'auto':
+        return 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("The numba backend requires numba (pip install numba)")
+    return backend
+
+def fixed_size_arrays(prices, orders, initial_capital=INITIAL_CAPITAL, position_size=1.0, commission=COMMISSION):
+    """Cash, shares and total equity of fixed-size trading via cumulative sums
+    
+    Arrays may be 1D (bars) or 2D (bars x strategies).
+    """
+    prices = np.asarray(prices, dtype=float)
+    orders = np.asarray(orders, dtype=float)
+    
+    # Cash flow of each bar (trade value plus commission)
+    position_value = position_size * prices
+    cash_flows = np.where(orders != 0, position_value * orders + position_value * commission, 0.0)
+    
+    cash = initial_capital - np.cumsum(cash_flows, axis=0)
+    shares = np.cumsum(orders * position_size, axis=0)
+    total = shares * prices + cash
+    
+    return cash, shares, total
+
+def execute_fixed(prices, orders, initial_capital=INITIAL_CAPITAL, position_size=1.0,
+                  commission=COMMISSION, backend='auto'):
+    """Trade `order * position_size` shares on every bar with a non-zero order
+    
+    Same accounting as Portfolio.update_portfolio: the commission is charged
+    on position_size * price. Returns cash, shares and total equity arrays
+    and a TRADE_DTYPE trade log.
+    """
+    prices = np.ascontiguousarray(prices, dtype=float)
+    orders = np.ascontiguousarray(orders, dtype=float)
+    
+    backend = resolve_backend(backend)
+    if backend != 'numpy':
+        loop = _compiled_kernels()['fixed'] if backend == 'numba' else _fixed_loop
+        cash, shares, total, rows = loop(
+            prices, orders, float(initial_capital), float(position_size), float(commission)
+        )
+    else:
+        cash, shares, total = fixed_size_arrays(prices, orders, initial_capital, position_size, commission)
+        rows = np.flatnonzero(orders != 0)
+    
+    trades = trade_records(rows, np.sign(orders[rows]), prices[rows], position_size,
+                        position_size * prices[rows], cash[rows])
+    return cash, shares, total, trades
+
+def execute_all_in(prices, orders, capital=INITIAL_CAPITAL, commission=COMMISSION, backend='auto'):
+    """Buy as many whole shares as `capital` affords on positive orders, sell everything on negative ones
+    
+    This is the sizing of SimpleBacktester: each buy spends up to the
+    initial capital plus commission, and a sell of an empty position does
+    nothing. Bars without a price never trade and carry the last valuation.
+    Returns cash, shares and total equity arrays and a TRADE_DTYPE trade log.
+    """
+    prices = np.ascontiguousarray(prices, dtype=float)
+    orders = np.ascontiguousarray(orders, dtype=float)
+    
+    backend = resolve_backend(backend)
+    if backend != 'numpy':
+        loop = _compiled_kernels()['all_in'] if backend == 'numba' else _all_in_loop
+        cash, shares, total, rows, traded = loop(prices, orders, float(capital), float(commission))
+    else:
+        cash, shares, total, rows, traded = _all_in_numpy(prices, orders, capital, commission)
+    
+    sides = np.where(orders[rows] > 0, 1, -1)
+    trades = trade_records(rows, sides, prices[rows], traded, traded * prices[rows], cash[rows])
+    return cash, shares, total, trades
+
+def _all_in_numpy(prices, orders, capital, commission):
+    """Vectorized all-in accounting
+    
+    Every sell empties the position, so the shares held at a bar are the
+    shares bought since the latest sell; cumulative sums of the buys then
+    give every position and cash flow without a Python loop.
+    """
+    bars = len(prices)
+    positions = np.arange(bars)
+    valid = ~np.isnan(prices)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bought = np.where((orders > 0) & valid, np.floor_divide(capital, prices), 0.0)
+    bought = np.where(bought > 0, bought, 0.0)
+    cumulative = np.cumsum(bought)
+    
+    # Cumulative buys as of the latest sell at or before each bar
+    sell = (orders < 0) & valid
+    last_sell = np.maximum.accumulate(np.where(sell, positions, -1))
+    shares = cumulative - np.where(last_sell >= 0, cumulative[np.maximum(last_sell, 0)], 0.0)
+    
+    # A sell closes whatever was bought since the sell before it
+    previous_sell = np.concatenate(([-1], last_sell[:-1]))
+    held = cumulative - np.where(previous_sell >= 0, cumulative[np.maximum(previous_sell, 0)], 0.0)
+    sold = np.where(sell, held, 0.0)
+    
+    cash_flows = np.zeros(bars)
+    buys = bought > 0
+    sells = sold > 0
+    cash_flows[buys] = -bought[buys] * prices[buys] * (1 + commission)
+    cash_flows[sells] = sold[sells] * prices[sells] * (1 - commission)
+    cash = capital + np.cumsum(cash_flows)
+    
+    # Value the position at the latest available price
+    last_valid = np.maximum.accumulate(np.where(valid, positions, -1))
+    holdings = np.where(last_valid >= 0, shares * prices[np.maximum(last_valid, 0)], 0.0)
+    total = cash + holdings
+    
+    rows = np.flatnonzero(buys | sells)
+    return cash, shares, total, rows, (bought + sold)[rows]
+
+def _first(condition, start, stop, chunk=256):
+    """First bar in [start, stop) where condition(start, end) is True, or -1
+    
+    The range is scanned in doubling chunks so that a search costs about as
+    much as the bars it actually has to look at.
+    """
+    while start < stop:
+        end = min(stop, start + chunk)
+        hits = np.flatnonzero(condition(start, end))
+        if len(hits):
+            return start + hits[0]
+        start = end
+        chunk *= 2
+    return -1
+
+def _orders_numpy(open_, high, low, close, orders, size_shares, size_notional, size_fraction,
+                  initial_capital, commission, slippage, entry_type, offset, valid_bars,
+                  stop_loss, take_profit, whole_shares):
+    """Event-driven equivalent of _orders_loop
+    
+    Instead of stepping through every bar it jumps from one trade to the
+    next with vectorized searches (next entry order, first bar touching a
+    limit/stop level, first stop-loss / take-profit / exit), so Python only
+    runs once per trade. Cash and shares per bar are then filled in from the
+    trade list.
+    """
+    bars = len(close)
+    entries = np.flatnonzero(orders > 0)
+    exits = np.flatnonzero(orders < 0)
+    
+    rows, sides, prices, quantities, cash_after = [], [], [], [], []
+    current_cash = initial_capital
+    
+    def next_index(indices, start):
+        position = np.searchsorted(indices, start)
+        return indices[position] if position < len(indices) else -1
+    
+    def buy(row, fill):
+        nonlocal current_cash
+        quantity = _quantity(row, fill, current_cash, size_shares, size_notional, size_fraction,
+                             commission, whole_shares)
+        if not quantity > 0:
+            return False
+        current_cash -= quantity * fill * (1 + commission)
+        rows.append(row)
+        sides.append(1)
+        prices.append(fill)
+        quantities.append(quantity)
+        cash_after.append(current_cash)
+        return True
+    
+    def sell(row, fill, quantity):
+        nonlocal current_cash
+        current_cash += quantity * fill * (1 - commission)
+        rows.append(row)
+        sides.append(-1)
+        prices.append(fill)
+        quantities.append(quantity)
+        cash_after.append(current_cash)
+    
+    bar = 0
+    while bar < bars:
+        # Flat: wait for the next entry order at a close
+        signal_row = next_index(entries, bar)
+        if signal_row < 0:
+            break
+        
+        if entry_type == MARKET:
+            if not buy(signal_row, close[signal_row] * (1 + slippage)):
+                bar = signal_row + 1
+                continue
+            entry_row = signal_row
+        else:
+            # The order works from the next bar until it fills, expires or an exit order cancels it
+            level = close[signal_row] * (1 - offset) if entry_type == LIMIT else close[signal_row] * (1 + offset)
+            window_end = min(bars - 1, signal_row + valid_bars)
+            cancel_row = next_index(exits, signal_row + 1)
+            if 0 <= cancel_row < window_end:
+                window_end = cancel_row
+            if entry_type == LIMIT:
+                touched = lambda start, end: low[start:end] <= level
+            else:
+                touched = lambda start, end: high[start:end] >= level
+            fill_row = _first(touched, signal_row + 1, window_end + 1)
+            
+            if fill_row < 0:
+                # Expired or cancelled; the close of the last bar may place a new order
+                bar = window_end if window_end > signal_row else signal_row + 1
+                continue
+            if entry_type == LIMIT:
+                fill = min(open_[fill_row], level)
+            else:
+                fill = max(open_[fill_row], level) * (1 + slippage)
+            if not buy(fill_row, fill):
+                bar = fill_row
+                continue
+            entry_row = fill_row
+        
+        entry_price = prices[-1]
+        held = quantities[-1]
+        
+        # An entry filled inside a bar can still be closed by that bar's exit order
+        if orders[entry_row] < 0:
+            sell(entry_row, close[entry_row] * (1 - slippage), held)
+            bar = entry_row + 1
+            continue
+        
+        # Long: wait for a stop-loss, take-profit or exit order
+        stop = entry_price * (1 - stop_loss)
+        target = entry_price * (1 + take_profit)
+        
+        def exit_condition(start, end):
+            hit = orders[start:end] < 0
+            if stop_loss > 0:
+                hit = hit | (low[start:end] <= stop)
+            if take_profit > 0:
+                hit = hit | (high[start:end] >= target)
+            return hit
+        
+        exit_row = _first(exit_condition, entry_row + 1, bars)
+        if exit_row < 0:
+            break
+        
+        if stop_loss > 0 and low[exit_row] <= stop:
+            sell(exit_row, min(open_[exit_row], stop) * (1 - slippage), held)
+            bar = exit_row
+        elif take_profit > 0 and high[exit_row] >= target:
+            sell(exit_row, max(open_[exit_row], target), held)
+            bar = exit_row
+        else:
+            sell(exit_row, close[exit_row] * (1 - slippage), held)
+            bar = exit_row + 1
+    
+    rows = np.array(rows, dtype=np.int64)
+    sides = np.array(sides, dtype=np.int64)
+    prices = np.array(prices, dtype=float)
+    quantities = np.array(quantities, dtype=float)
+    cash_after = np.array(cash_after, dtype=float)
+    
+    # State at each close is the state after the bar's last trade, slot 0 is the start
+    last = np.searchsorted(rows, np.arange(bars), side='right')
+    cash = np.concatenate(([initial_capital], cash_after))[last]
+    shares = np.concatenate(([0.0], np.cumsum(sides * quantities)))[last]
+    total = shares * close + cash
+    
+    return cash, shares, total, rows, sides, prices, quantities, cash_after
+
+def execute_orders(open_, high, low, close, orders, size_shares, size_notional, size_fraction,
+                   initial_capital=INITIAL_CAPITAL, commission=COMMISSION, slippage=0.0,
+                   entry_type=MARKET, offset=0.0, valid_bars=1, stop_loss=0.0, take_profit=0.0,
+                   whole_shares=True, backend='auto'):
+    """Long-only execution with per-bar sizing, slippage and High/Low based fills
+    
+    Positive orders open a position when flat, negative orders close it at
+    the close. The entry buys size_shares + (size_notional + size_fraction *
+    equity) / price shares, so the sizing arrays express fixed shares, fixed
+    notional, percent of equity or any per-bar mix. Limit and stop entries
+    are placed at offset from the signal close and fill on a later bar whose
+    Low / High reaches the level, within valid_bars. stop_loss and
+    take_profit (fractions of the entry price, 0 disables) exit inside the
+    bar. Slippage worsens market, stop and stop-loss fills by a fraction of
+    the price. Returns cash, shares and total equity arrays and a
+    TRADE_DTYPE trade log.
+    """
+    arrays = [np.ascontiguousarray(values, dtype=float)
+              for values in (open_, high, low, close, orders, size_shares, size_notional, size_fraction)]
+    options = (float(initial_capital), float(commission), float(slippage), int(entry_type), float(offset),
+               int(valid_bars), float(stop_loss), float(take_profit), bool(whole_shares))
+    
+    backend = resolve_backend(backend)
+    if backend == 'numba':
+        kernel = _compiled_kernels()['orders']
+    elif backend == 'python':
+        kernel = _orders_loop
+    else:
+        kernel = _orders_numpy
+    cash, shares, total, rows, sides, prices, quantities, cash_after = kernel(*arrays, *options)
+    
+    trades = trade_records(rows, sides, prices, quantities, quantities * prices, cash_after)
+    return cash, shares, total, trades
+
+# Test the kernels
+if __name__ == "__main__":
+    import time
+    
+    bars = 1_000_000
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    signal = (pd.Series(prices).rolling(50, min_periods=1).mean() >
+              pd.Series(prices).rolling(200, min_periods=1).mean()).astype(float).to_numpy()
+    orders = np.diff(signal, prepend=0.0)
+    
+    for backend in ('numpy', 'numba') if NUMBA_AVAILABLE else ('numpy',):
+        for name, kernel, args in [('fixed', execute_fixed, (10000.0, 1.0)), ('all-in', execute_all_in, (10000.0,))]:
+            kernel(prices[:1000], orders[:1000], *args, backend=backend)
+            start = time.perf_counter()
+            cash, shares, total, trades = kernel(prices, orders, *args, backend=backend)
+            elapsed = time.perf_counter() - start
+            print(f"{backend:<6} {name:<7} {bars / elapsed:>14,.0f} bars/s  {len(trades)} trades  final equity {total[-1]:,.2f}")
@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INITIAL_CAPITAL, COMMISSION
+
+class MultiAssetPortfolio:
+    """Portfolio of many tickers trading against one shared cash balance
+    
+    Takes aligned (dates x tickers) price and signal matrices. Whenever the
+    target weights (equal weight across the active tickers for 0/1 signals)
+    change, the tickers whose target changed are traded to it using whole
+    shares; tickers with an unchanged target keep their shares. With
+    drift_threshold set, a ticker whose weight has drifted further than
+    that from its target is rebalanced on the same dates as well. The
+    rebalance itself is vectorized across tickers and holdings between
+    rebalances are marked to market in one pass, so the cost grows with
+    the number of rebalance dates, not with the number of tickers.
+    """
+    
+    def __init__(self, initial_capital=INITIAL_CAPITAL, commission=COMMISSION, drift_threshold=None):
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.drift_threshold = drift_threshold
+        self.cash = initial_capital
+        self.holdings = pd.DataFrame()
+        self.positions = pd.DataFrame()
+        self.asset_holdings = pd.DataFrame()
+        self.trades = pd.DataFrame(columns=['date', 'ticker', 'type', 'price', 'shares', 'value', 'commission', 'cash_after'])
+    
+    def run(self, prices, signals):
+        """Simulate the portfolio over a price matrix and a signal matrix"""
+        signals = signals.reindex(index=prices.index, columns=prices.columns)
+        tickers = prices.columns
+        dates = prices.index
+        
+        # Tickers can only be held and valued once they have a price
+        price_values = prices.ffill().to_numpy(dtype=float)
+        tradable = ~np.isnan(price_values)
+        price_values = np.where(tradable, price_values, 0.0)
+        weights = np.where(tradable, np.nan_to_num(signals.to_numpy(dtype=float)), 0.0)
+        weights = np.clip(weights, 0.0, None)
+        weight_sums = weights.sum(axis=1, keepdims=True)
+        weights = np.divide(weights, weight_sums, out=np.zeros_like(weights), where=weight_sums > 0)
+        
+        commission = self.commission
+        if isinstance(commission, (pd.Series, dict)):
+            commission = pd.Series(commission).reindex(tickers).fillna(COMMISSION).to_numpy(dtype=float)
+        commission = np.broadcast_to(np.asarray(commission, dtype=float), (len(tickers),))
+        
+        # Rebalance wherever the target weights change, trading only the tickers whose target did
+        changed = np.empty(weights.shape, dtype=bool)
+        if len(dates):
+            changed[0] = weights[0] != 0
+            changed[1:] = weights[1:] != weights[:-1]
+        rebalance_rows = np.flatnonzero(changed.any(axis=1))
+        
+        shares = np.zeros(len(tickers))
+        cash = self.initial_capital
+        shares_after = np.zeros((len(rebalance_rows), len(tickers)))
+        cash_after = np.zeros(len(rebalance_rows))
+        trade_log = []
+        
+        for i, row in enumerate(rebalance_rows):
+            price = price_values[row]
+            equity = cash + shares @ price
+            trade = changed[row]
+            if self.drift_threshold is not None and equity > 0:
+                trade = trade | (np.abs(shares * price / equity - weights[row]) > self.drift_threshold)
+            cash, shares, trades = self._rebalance(cash, shares, price, weights[row], equity, commission, trade)
+            
+            shares_after[i] = shares
+            cash_after[i] = cash
+            if len(trades[0]):
+                trade_log.append((row, trades, cash))
+        
+        # Carry the state of the last rebalance forward to every bar
+        last_rebalance = np.searchsorted(rebalance_rows, np.arange(len(dates)), side='right') - 1
+        has_rebalanced = last_rebalance >= 0
+        shares_matrix = np.where(has_rebalanced[:, None], shares_after[np.maximum(last_rebalance, 0)], 0.0)
+        cash_series = np.where(has_rebalanced, cash_after[np.maximum(last_rebalance, 0)], self.initial_capital)
+        value_matrix = shares_matrix * price_values
+        
+        self.cash = cash
+        self.positions = pd.DataFrame(shares_matrix, index=dates, columns=tickers)
+        self.asset_holdings = pd.DataFrame(value_matrix, index=dates, columns=tickers)
+        holdings = value_matrix.sum(axis=1)
+        self.holdings = pd.DataFrame({
+            'cash': cash_series,
+            'holdings': holdings,
+            'total': cash_series + holdings
+        }, index=dates)
+        self.trades = self._trades_frame(trade_log, dates, tickers)
+        
+        return self.holdings
+    
+    @staticmethod
+    def _rebalance(cash, shares, price, weights, equity, commission, trade):
+        """Move the whole-share positions selected by trade to the target weights of the current equity"""
+        priced = (price > 0) & trade
+        target = np.zeros_like(shares)
+        target[priced] = np.floor(weights[priced] * equity / (price[priced] * (1 + commission[priced])))
+        target = np.where(priced, target, shares)
+        delta = target - shares
+        
+        # Scale buys down if commissions on the sells leave too little cash
+        cost = delta * price + np.abs(delta) * price * commission
+        buys = delta > 0
+        if cash - cost.sum() < 0 and buys.any():
+            available = cash - cost[~buys].sum()
+            scale = max(available, 0.0) / cost[buys].sum()
+            delta[buys] = np.floor(delta[buys] * scale)
+            cost = delta * price + np.abs(delta) * price * commission
+        
+        traded = np.flatnonzero(delta)
+        trades = (traded, delta[traded], price[traded], np.abs(delta[traded]) * price[traded] * commission[traded])
+        return cash - cost.sum(), shares + delta, trades
+    
+    @staticmethod
+    def _trades_frame(trade_log, dates, tickers):
+        """Flatten the per-rebalance trade arrays into a trade history"""
+        columns = ['date', 'ticker', 'type', 'price', 'shares', 'value', 'commission', 'cash_after']
+        if not trade_log:
+            return pd.DataFrame(columns=columns)
+        
+        rows = np.concatenate([np.full(len(trades[0]), row) for row, trades, _ in trade_log])
+        assets = np.concatenate([trades[0] for _, trades, _ in trade_log])
+        delta = np.concatenate([trades[1] for _, trades, _ in trade_log])
+        price = np.concatenate([trades[2] for _, trades, _ in trade_log])
+        commission = np.concatenate([trades[3] for _, trades, _ in trade_log])
+        cash_after = np.concatenate([np.full(len(trades[0]), cash) for _, trades, cash in trade_log])
+        
+        return pd.DataFrame({
+            'date': dates[rows],
+            'ticker': tickers[assets],
+            'type': np.where(delta > 0, 'BUY', 'SELL'),
+            'price': price,
+            'shares': np.abs(delta),
+            'value': np.abs(delta) * price,
+            'commission': commission,
+            'cash_after': cash_after
+        }, columns=columns)
+
+# Test the multi-asset portfolio
+if __name__ == "__main__":
+    np.random.seed(42)
+    dates = pd.date_range('2023-01-01', periods=250)
+    tickers = [f"T{i}" for i in range(5)]
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(np.random.normal(0, 0.02, (250, 5)), axis=0)), index=dates, columns=tickers)
+    
+    # Hold each ticker while it trades above its 20-day average
+    signals = (prices > prices.rolling(20, min_periods=1).mean()).astype(float)
+    
+    portfolio = MultiAssetPortfolio(initial_capital=100000)
+    portfolio.run(prices, signals)
+    
+    print("Portfolio Holdings:")
+    print(portfolio.holdings.tail())
+    print(f"\n{len(portfolio.trades)} trades")
+    print(portfolio.trades.head())
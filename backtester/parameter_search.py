@@ -0,0 +1,143 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+import math
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Import from the same directory
+from portfolio import Portfolio
+from performance import BatchPerformanceMetrics
+
+from strategies.moving_average_crossover import crossover_signals
+
+class SuccessiveHalvingSearch:
+    """Successive-halving search over MovingAverageCrossover windows
+    
+    All candidates are first scored on a short prefix of the history; only
+    the best 1/eta of them move on to the next rung, which uses eta times
+    as many bars, until the survivors are scored on the full series. With
+    n_samples set, the candidates are a random sample of the grid instead
+    of the whole grid. Scoring uses the same Sharpe ratio criterion as
+    Backtester.optimize_parameters.
+    """
+    
+    def __init__(self, strategy, parameter_grid, eta=3, min_bars=None, n_samples=None, seed=None,
+                 initial_capital=10000.0):
+        unsupported = set(parameter_grid) - {'short_window', 'long_window'}
+        if unsupported:
+            raise ValueError(f"Successive halving only searches moving average windows, got {sorted(unsupported)}")
+        
+        self.strategy = strategy
+        self.eta = eta
+        self.initial_capital = initial_capital
+        self.pairs = [
+            (short, long)
+            for short in parameter_grid.get('short_window', [strategy.parameters['short_window']])
+            for long in parameter_grid.get('long_window', [strategy.parameters['long_window']])
+        ]
+        self.grid_size = len(self.pairs)
+        
+        if n_samples is not None and n_samples < len(self.pairs):
+            rng = np.random.default_rng(seed)
+            chosen = np.sort(rng.choice(len(self.pairs), size=n_samples, replace=False))
+            self.pairs = [self.pairs[i] for i in chosen]
+        
+        close_data = strategy._close_data()
+        self.prices = close_data.to_numpy(dtype=float)
+        self.windows = sorted({window for pair in self.pairs for window in pair})
+        self.means = strategy.batch_moving_averages(self.windows)
+        
+        # Smallest slice long enough to fill the longest window
+        self.min_bars = min_bars or min(len(self.prices), 2 * max(self.windows))
+    
+    def budgets(self):
+        """Bars used by each rung, growing by eta up to the full history
+        
+        Rungs before the last are dropped, longest first, while the schedule
+        would cost at least as many bar-evaluations as scoring every
+        candidate on the full history; a single rung is that exhaustive run.
+        """
+        bars = len(self.prices)
+        rungs = max(1, math.ceil(math.log(max(bars / self.min_bars, 1), self.eta)) + 1)
+        budgets = [min(bars, int(self.min_bars * self.eta ** rung)) for rung in range(rungs - 1)] + [bars]
+        
+        exhaustive = len(self.pairs) * bars
+        while len(budgets) > 1 and self.cost(budgets) >= exhaustive:
+            del budgets[-2]
+        return budgets
+    
+    def cost(self, budgets):
+        """Bar-evaluations of a rung schedule"""
+        candidates = len(self.pairs)
+        total = 0
+        for bars in budgets:
+            total += candidates * bars
+            candidates = max(1, math.ceil(candidates / self.eta))
+        return total
+    
+    def score(self, pairs, bars):
+        """Metrics of every pair over the first `bars` bars"""
+        signal = crossover_signals(self.means, self.windows, pairs, 0, bars)
+        total = Portfolio.simulate_signals(self.prices[:bars], signal, self.initial_capital)
+        return BatchPerformanceMetrics(Portfolio.equity_returns(total)).calculate_metrics()
+    
+    def run(self):
+        """Run the search and report the bar-evaluations saved against the full grid"""
+        candidates = list(self.pairs)
+        bar_evaluations = 0
+        rungs = []
+        
+        for bars in self.budgets():
+            metrics = self.score(candidates, bars)
+            bar_evaluations += len(candidates) * bars
+            rungs.append({'bars': bars, 'candidates': len(candidates)})
+            
+            if bars == len(self.prices):
+                break
+            
+            # Keep the best 1/eta, unscorable candidates last
+            scores = np.nan_to_num(metrics['sharpe_ratio'], nan=-np.inf)
+            keep = max(1, math.ceil(len(candidates) / self.eta))
+            survivors = np.sort(np.argsort(-scores, kind='stable')[:keep])
+            candidates = [candidates[i] for i in survivors]
+        
+        results = []
+        for i, (short, long) in enumerate(candidates):
+            performance = {name: values[i] for name, values in metrics.items()}
+            results.append({
+                'params': {'short_window': short, 'long_window': long},
+                'performance': performance,
+                'score': performance['sharpe_ratio']
+            })
+        
+        best = max(results, key=lambda result: np.nan_to_num(result['score'], nan=-np.inf))
+        full_grid = self.grid_size * len(self.prices)
+        
+        return {
+            'best_params': best['params'],
+            'best_performance': best['score'],
+            'all_results': results,
+            'rungs': rungs,
+            'bar_evaluations': bar_evaluations,
+            'full_grid_bar_evaluations': full_grid,
+            'saved_bar_evaluations': max(0, full_grid - bar_evaluations)
+        }
+
+# Test the search
+if __name__ == "__main__":
+    from data.data_loader import DataLoader
+    from strategies.moving_average_crossover import MovingAverageCrossover
+    
+    data = DataLoader().load_data()
+    strategy = MovingAverageCrossover(data)
+    grid = {'short_window': range(5, 100, 5), 'long_window': range(50, 300, 10)}
+    
+    results = SuccessiveHalvingSearch(strategy, grid).run()
+    
+    print(f"Best parameters: {results['best_params']} (Sharpe {results['best_performance']:.2f})")
+    print(f"Rungs: {results['rungs']}")
+    print(f"Bar-evaluations: {results['bar_evaluations']:,} of {results['full_grid_bar_evaluations']:,} "
+          f"({results['saved_bar_evaluations']:,} saved)")
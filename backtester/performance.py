@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-from scipy import stats
 import sys
 import os
 
@@ -12,6 +11,15 @@ class PerformanceMetrics:
         self.portfolio_returns = portfolio_returns
         self.benchmark_returns = benchmark_returns
         self.risk_free_rate = risk_free_rate
+        self._drawdown = None
+        
+    def drawdown(self):
+        """Drawdown of the cumulative wealth from its running peak, computed once"""
+        if self._drawdown is None:
+            cumulative_returns = (1 + self.portfolio_returns).cumprod()
+            peak = cumulative_returns.expanding(min_periods=1).max()
+            self._drawdown = (cumulative_returns - peak) / peak
+        return self._drawdown
         
     def calculate_metrics(self):
         """Calculate comprehensive performance metrics"""
@@ -32,10 +40,7 @@ class PerformanceMetrics:
         metrics['sharpe_ratio'] = excess_returns.mean() / excess_returns.std() * np.sqrt(252)
         
         # Maximum drawdown
-        cumulative_returns = (1 + self.portfolio_returns).cumprod()
-        peak = cumulative_returns.expanding(min_periods=1).max()
-        drawdown = (cumulative_returns - peak) / peak
-        metrics['max_drawdown'] = drawdown.min()
+        metrics['max_drawdown'] = self.drawdown().min()
         
         # Sortino ratio
         negative_returns = self.portfolio_returns[self.portfolio_returns < 0]
@@ -89,7 +94,7 @@ class PerformanceMetrics:
         
         """
         
-        if self.benchmark_returns is not None:
+        if 'beta' in metrics:
             report += f"""
         Benchmark Comparison:
         - Alpha: {metrics.get('alpha', 0):.2%}
@@ -106,6 +111,261 @@ class PerformanceMetrics:
         
         return report
 
+class RunningMoments:
+    """Count, mean and sum of squared deviations, merged value by value or chunk by chunk"""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        
+    def add(self, value):
+        """Welford update with a single value"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        
+    def add_chunk(self, values):
+        """Merge the moments of a chunk of values"""
+        count = len(values)
+        if count == 0:
+            return
+        
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        
+    def variance(self, ddof=1):
+        if self.count - ddof <= 0:
+            return np.nan
+        return self.m2 / (self.count - ddof)
+    
+    def std(self, ddof=1):
+        return np.sqrt(self.variance(ddof))
+
+class RunningCovariance:
+    """Running co-moment of two paired series"""
+    
+    def __init__(self):
+        self.x = RunningMoments()
+        self.y = RunningMoments()
+        self.comoment = 0.0
+        
+    def add_chunk(self, x, y):
+        """Merge the co-moment of a chunk of paired values"""
+        count = len(x)
+        if count == 0:
+            return
+        
+        mean_x = x.mean()
+        mean_y = y.mean()
+        comoment = ((x - mean_x) * (y - mean_y)).sum()
+        previous = self.x.count
+        total = previous + count
+        self.comoment += comoment + (mean_x - self.x.mean) * (mean_y - self.y.mean) * previous * count / total
+        self.x.add_chunk(x)
+        self.y.add_chunk(y)
+        
+    def covariance(self, ddof=1):
+        if self.x.count - ddof <= 0:
+            return np.nan
+        return self.comoment / (self.x.count - ddof)
+
+class StreamingPerformanceMetrics:
+    """Single-pass accumulator producing the same metrics as PerformanceMetrics
+    
+    Returns are fed bar by bar or in chunks through update(); only running
+    totals are kept, so memory does not grow with the length of the series.
+    """
+    
+    def __init__(self, risk_free_rate=0.0, with_benchmark=False):
+        self.risk_free_rate = risk_free_rate
+        self.with_benchmark = with_benchmark
+        self.returns = RunningMoments()
+        self.downside = RunningMoments()
+        self.benchmark = RunningCovariance()
+        self.active = RunningMoments()
+        self.wealth = 1.0
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+        self.winning = 0
+        self.nonzero = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        
+    def update(self, returns, benchmark_returns=None):
+        """Consume a single return or a chunk of returns"""
+        returns = np.atleast_1d(np.asarray(returns, dtype=float))
+        if self.with_benchmark:
+            if benchmark_returns is None:
+                raise ValueError("Benchmark returns are required for every update")
+            benchmark_returns = np.atleast_1d(np.asarray(benchmark_returns, dtype=float))
+            self.benchmark.add_chunk(returns, benchmark_returns)
+            self.active.add_chunk(returns - benchmark_returns)
+        
+        if len(returns) == 1:
+            self._update_one(float(returns[0]))
+            return
+        
+        self.returns.add_chunk(returns)
+        self.downside.add_chunk(returns[returns < 0])
+        
+        # Drawdown of the cumulative wealth, continuing from the previous peak
+        wealth = self.wealth * np.cumprod(1 + returns)
+        peaks = np.maximum(np.maximum.accumulate(wealth), self.peak)
+        self.max_drawdown = min(self.max_drawdown, ((wealth - peaks) / peaks).min())
+        self.wealth = wealth[-1]
+        self.peak = peaks[-1]
+        
+        self.winning += int((returns > 0).sum())
+        self.nonzero += int((returns != 0).sum())
+        self.gross_profit += returns[returns > 0].sum()
+        self.gross_loss += returns[returns < 0].sum()
+        
+    def _update_one(self, value):
+        """Scalar fast path of update"""
+        self.returns.add(value)
+        if value < 0:
+            self.downside.add(value)
+            self.gross_loss += value
+        elif value > 0:
+            self.winning += 1
+            self.gross_profit += value
+        if value != 0:
+            self.nonzero += 1
+        
+        self.wealth *= 1 + value
+        self.peak = max(self.peak, self.wealth)
+        self.max_drawdown = min(self.max_drawdown, (self.wealth - self.peak) / self.peak)
+        
+    def calculate_metrics(self):
+        """Calculate the metrics of all returns seen so far"""
+        metrics = {}
+        days = self.returns.count
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Return metrics
+            metrics['total_return'] = np.float64(self.wealth) - 1
+            metrics['annualized_return'] = (1 + metrics['total_return']) ** (252 / days) - 1 if days else np.nan
+            
+            # Risk metrics
+            std = np.float64(self.returns.std())
+            metrics['volatility'] = std * np.sqrt(252)
+            metrics['sharpe_ratio'] = (self.returns.mean - self.risk_free_rate / 252) / std * np.sqrt(252)
+            metrics['max_drawdown'] = np.float64(self.max_drawdown) if days else np.nan
+            downside_std = np.float64(self.downside.std()) * np.sqrt(252)
+            metrics['sortino_ratio'] = (metrics['annualized_return'] - self.risk_free_rate) / downside_std
+            
+            # Alpha and beta if benchmark provided
+            if self.with_benchmark:
+                metrics['beta'] = np.float64(self.benchmark.covariance()) / self.benchmark.y.variance(ddof=0)
+                metrics['alpha'] = metrics['annualized_return'] - (
+                    metrics['beta'] * (self.benchmark.y.mean * 252)
+                )
+                metrics['information_ratio'] = (
+                    self.active.mean * np.sqrt(252) / np.float64(self.active.std())
+                )
+        
+        # Trade metrics
+        metrics['win_rate'] = self.winning / self.nonzero if self.nonzero > 0 else 0
+        gross_loss = abs(self.gross_loss)
+        metrics['profit_factor'] = self.gross_profit / gross_loss if gross_loss != 0 else float('inf')
+        
+        return metrics
+    
+    generate_report = PerformanceMetrics.generate_report
+
+class BatchPerformanceMetrics:
+    """PerformanceMetrics for many strategies at once
+    
+    Takes a (bars x strategies) returns matrix and computes every metric of
+    PerformanceMetrics as a vector with axis-wise NumPy reductions. Columns
+    are processed in blocks to bound the size of the temporary arrays.
+    """
+    
+    def __init__(self, returns_matrix, benchmark_returns=None, risk_free_rate=0.0, block_size=4096):
+        self.returns_matrix = returns_matrix
+        self.benchmark_returns = benchmark_returns
+        self.risk_free_rate = risk_free_rate
+        self.block_size = block_size
+        
+    def calculate_metrics(self):
+        """Calculate every metric as a vector with one entry per strategy"""
+        returns = np.asarray(self.returns_matrix, dtype=float)
+        if returns.ndim == 1:
+            returns = returns[:, None]
+        benchmark = None
+        if self.benchmark_returns is not None:
+            benchmark = np.asarray(self.benchmark_returns, dtype=float)
+        
+        # Without strategy columns one empty block still yields empty metric vectors
+        blocks = [
+            self._block_metrics(returns[:, start:start + self.block_size], benchmark)
+            for start in range(0, max(returns.shape[1], 1), self.block_size)
+        ]
+        metrics = {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+        
+        # Label the vectors with the strategy names when they are known
+        if isinstance(self.returns_matrix, pd.DataFrame):
+            metrics = {name: pd.Series(values, index=self.returns_matrix.columns) for name, values in metrics.items()}
+        
+        return metrics
+    
+    def _block_metrics(self, returns, benchmark):
+        """Calculate the metrics of a block of strategy columns"""
+        metrics = {}
+        days = len(returns)
+        sqrt_252 = np.sqrt(252)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Return metrics
+            metrics['total_return'] = np.prod(1 + returns, axis=0) - 1
+            metrics['annualized_return'] = (1 + metrics['total_return']) ** (252 / days) - 1
+            
+            # Risk metrics
+            std = returns.std(axis=0, ddof=1)
+            metrics['volatility'] = std * sqrt_252
+            metrics['sharpe_ratio'] = (returns.mean(axis=0) - self.risk_free_rate / 252) / std * sqrt_252
+            
+            cumulative_returns = np.cumprod(1 + returns, axis=0)
+            peak = np.maximum.accumulate(cumulative_returns, axis=0)
+            metrics['max_drawdown'] = ((cumulative_returns - peak) / peak).min(axis=0)
+            
+            # Standard deviation of the negative returns only
+            negative = returns < 0
+            negative_count = negative.sum(axis=0)
+            negative_sum = np.where(negative, returns, 0.0).sum(axis=0)
+            negative_mean = negative_sum / negative_count
+            negative_m2 = np.where(negative, (returns - negative_mean) ** 2, 0.0).sum(axis=0)
+            downside_std = np.where(negative_count > 1, np.sqrt(negative_m2 / (negative_count - 1)), np.nan) * sqrt_252
+            metrics['sortino_ratio'] = (metrics['annualized_return'] - self.risk_free_rate) / downside_std
+            
+            # Alpha and beta if benchmark provided
+            if benchmark is not None:
+                benchmark_mean = benchmark.mean()
+                covariance = ((returns - returns.mean(axis=0)) * (benchmark - benchmark_mean)[:, None]).sum(axis=0) / (days - 1)
+                metrics['beta'] = covariance / np.var(benchmark)
+                metrics['alpha'] = metrics['annualized_return'] - metrics['beta'] * (benchmark_mean * 252)
+                
+                active_returns = returns - benchmark[:, None]
+                metrics['information_ratio'] = active_returns.mean(axis=0) * sqrt_252 / active_returns.std(axis=0, ddof=1)
+            
+            # Trade metrics
+            winning = (returns > 0).sum(axis=0)
+            nonzero = (returns != 0).sum(axis=0)
+            metrics['win_rate'] = np.where(nonzero > 0, winning / nonzero, 0.0)
+            
+            gross_profit = np.where(returns > 0, returns, 0.0).sum(axis=0)
+            gross_loss = np.abs(negative_sum)
+            metrics['profit_factor'] = np.where(gross_loss != 0, gross_profit / gross_loss, np.inf)
+        
+        return metrics
+
 # Test the performance metrics
 if __name__ == "__main__":
     # Create sample returns for testing
@@ -8,23 +8,128 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import INITIAL_CAPITAL, COMMISSION
 
+# Import from the same directory
+from kernels import TRADE_DTYPE, trade_records, execute_fixed, execute_all_in, execute_orders, fixed_size_arrays
+from sizing import FixedShares, FillModel
+
+TRADE_COLUMNS = ['date', 'type', 'price', 'shares', 'value', 'cash_after']
+
+class PortfolioLedger:
+    """Preallocated NumPy buffers holding the portfolio state of every bar"""
+    
+    def __init__(self, index, initial_capital, trade_capacity=64):
+        self.index = index
+        size = len(index)
+        self.cash = np.full(size, initial_capital, dtype=float)
+        self.holdings = np.zeros(size, dtype=float)
+        self.total = np.full(size, initial_capital, dtype=float)
+        self.trades = np.zeros(trade_capacity, dtype=TRADE_DTYPE)
+        self.trade_count = 0
+        self._cursor = 0
+        
+    def row(self, date):
+        """Return the buffer row of a date, assuming mostly sequential updates"""
+        cursor = self._cursor
+        if cursor < len(self.index) and self.index[cursor] == date:
+            self._cursor = cursor + 1
+            return cursor
+        
+        row = self.index.get_loc(date)
+        if not isinstance(row, (int, np.integer)):
+            raise KeyError(f"Date {date} is not unique in the portfolio index")
+        self._cursor = row + 1
+        return row
+    
+    def record_trade(self, row, side, price, shares, value, cash_after):
+        """Append a trade, doubling the record buffer when it is full"""
+        if self.trade_count == len(self.trades):
+            grown = np.zeros(max(2 * len(self.trades), 1), dtype=TRADE_DTYPE)
+            grown[:self.trade_count] = self.trades
+            self.trades = grown
+        
+        self.trades[self.trade_count] = (row, side, price, shares, value, cash_after)
+        self.trade_count += 1
+        
+    def set_trades(self, rows, sides, prices, shares, values, cash_after):
+        """Replace the trade history with whole arrays at once"""
+        self.trades = trade_records(rows, sides, prices, shares, values, cash_after)
+        self.trade_count = len(rows)
+        
+    def holdings_frame(self):
+        """Build the holdings DataFrame from the buffers"""
+        return pd.DataFrame({
+            'cash': self.cash,
+            'holdings': self.holdings,
+            'total': self.total
+        }, index=self.index)
+    
+    def trades_frame(self):
+        """Build the trade history DataFrame from the trade records"""
+        trades = self.trades[:self.trade_count]
+        return pd.DataFrame({
+            'date': self.index[trades['row']],
+            'type': np.where(trades['side'] > 0, 'BUY', 'SELL'),
+            'price': trades['price'],
+            'shares': trades['shares'],
+            'value': trades['value'],
+            'cash_after': trades['cash_after']
+        }, columns=TRADE_COLUMNS)
+    
+    def positions_frame(self):
+        """Build the share changes per traded date from the trade records"""
+        trades = self.trades[:self.trade_count]
+        rows, inverse = np.unique(trades['row'], return_inverse=True)
+        shares = np.zeros(len(rows))
+        np.add.at(shares, inverse, trades['side'] * trades['shares'])
+        return pd.DataFrame({'shares': shares}, index=self.index[rows])
+
 class Portfolio:
     def __init__(self, initial_capital=INITIAL_CAPITAL):
         self.initial_capital = initial_capital
-        self.positions = pd.DataFrame(columns=['shares'])
         self.cash = initial_capital
-        self.holdings = pd.DataFrame()
-        self.trades = pd.DataFrame(columns=['date', 'type', 'price', 'shares', 'value', 'cash_after'])
+        self.shares = 0.0
+        self.ledger = None
+        self._frames = {}
+        
+    @property
+    def holdings(self):
+        """Cash, holdings and total value per bar"""
+        if self.ledger is None:
+            return pd.DataFrame()
+        return self._frame('holdings', self.ledger.holdings_frame)
+    
+    @property
+    def trades(self):
+        """Trade history"""
+        if self.ledger is None:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+        return self._frame('trades', self.ledger.trades_frame)
+    
+    @property
+    def positions(self):
+        """Share changes per traded date"""
+        if self.ledger is None:
+            return pd.DataFrame(columns=['shares'])
+        return self._frame('positions', self.ledger.positions_frame)
+    
+    def _frame(self, name, build):
+        """Build a DataFrame view of the ledger once and reuse it until the next update"""
+        if name not in self._frames:
+            self._frames[name] = build()
+        return self._frames[name]
         
     def initialize_portfolio(self, index):
         """Initialize portfolio with cash only"""
-        self.holdings = pd.DataFrame(index=index)
-        self.holdings['cash'] = self.initial_capital
-        self.holdings['holdings'] = 0.0
-        self.holdings['total'] = self.initial_capital
+        self.cash = self.initial_capital
+        self.shares = 0.0
+        self.ledger = PortfolioLedger(index, self.initial_capital)
+        self._frames = {}
         
     def update_portfolio(self, date, price, signal, position_size=1.0):
         """Update portfolio based on trading signals"""
+        ledger = self.ledger
+        row = ledger.row(date)
+        
         # Calculate position value
         position_value = position_size * price
         
@@ -33,32 +138,138 @@ class Portfolio:
             # Calculate commission cost
             commission_cost = position_value * COMMISSION
             
-            # Update cash (including commission)
+            # Update cash (including commission) and the running share count
             self.cash -= (position_value * signal) + commission_cost
-            
-            # Update positions
-            if date not in self.positions.index:
-                self.positions.loc[date] = {'shares': signal * position_size}
-            else:
-                self.positions.loc[date, 'shares'] += signal * position_size
+            self.shares += signal * position_size
         
         # Update holdings
-        current_shares = self.positions['shares'].sum() if not self.positions.empty else 0
-        self.holdings.loc[date, 'holdings'] = current_shares * price
-        self.holdings.loc[date, 'cash'] = self.cash
-        self.holdings.loc[date, 'total'] = self.holdings.loc[date, 'holdings'] + self.cash
+        ledger.holdings[row] = self.shares * price
+        ledger.cash[row] = self.cash
+        ledger.total[row] = ledger.holdings[row] + self.cash
         
         # Record trade
         if signal != 0:
-            trade_record = {
-                'date': date,
-                'type': 'BUY' if signal > 0 else 'SELL',
-                'price': price,
-                'shares': position_size,
-                'value': position_value,
-                'cash_after': self.cash
-            }
-            self.trades = pd.concat([self.trades, pd.DataFrame([trade_record])], ignore_index=True)
+            ledger.record_trade(row, 1 if signal > 0 else -1, price, position_size, position_value, self.cash)
+        
+        if self._frames:
+            self._frames = {}
+    
+    def restore(self, holdings, trades):
+        """Rebuild the portfolio state from previously computed holdings and trades"""
+        ledger = PortfolioLedger(holdings.index, self.initial_capital, trade_capacity=0)
+        ledger.cash[:] = holdings['cash'].to_numpy(dtype=float)
+        ledger.holdings[:] = holdings['holdings'].to_numpy(dtype=float)
+        ledger.total[:] = holdings['total'].to_numpy(dtype=float)
+        ledger.set_trades(
+            holdings.index.get_indexer(trades['date']),
+            np.where(trades['type'] == 'BUY', 1, -1),
+            trades['price'].to_numpy(dtype=float),
+            trades['shares'].to_numpy(dtype=float),
+            trades['value'].to_numpy(dtype=float),
+            trades['cash_after'].to_numpy(dtype=float)
+        )
+        
+        self.ledger = ledger
+        self._frames = {}
+        self.cash = ledger.cash[-1] if len(ledger.cash) else self.initial_capital
+        self.shares = ledger.trades['shares'] @ ledger.trades['side'] if ledger.trade_count else 0.0
+    
+    @staticmethod
+    def simulate(prices, signals, initial_capital=INITIAL_CAPITAL, position_size=1.0, commission=COMMISSION):
+        """Compute cash, shares and total equity arrays in one vectorized pass
+        
+        Mirrors the accounting of update_portfolio: every non-zero signal trades
+        signal * position_size shares and pays commission on position_size * price.
+        Arrays may be 1D (bars) or 2D (bars x strategies).
+        """
+        return fixed_size_arrays(prices, signals, initial_capital, position_size, commission)
+    
+    @classmethod
+    def simulate_signals(cls, prices, signal, initial_capital=INITIAL_CAPITAL, position_size=1.0, commission=COMMISSION):
+        """Total equity of holding position_size shares while the signal is 1
+        
+        Orders are the changes of the signal; a long signal on the first bar
+        is entered on that bar. Works on (bars x strategies) signal matrices.
+        """
+        signal = np.asarray(signal, dtype=float)
+        orders = np.diff(signal, axis=0, prepend=np.zeros((1,) + signal.shape[1:]))
+        prices = np.asarray(prices, dtype=float)
+        if orders.ndim == 2 and prices.ndim == 1:
+            prices = prices[:, None]
+        
+        _, _, total = cls.simulate(prices, orders, initial_capital, position_size, commission)
+        return total
+    
+    @staticmethod
+    def equity_returns(total):
+        """Bar returns of an equity curve (or matrix of curves), zero on the first bar"""
+        total = np.asarray(total, dtype=float)
+        returns = np.zeros_like(total)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[1:] = total[1:] / total[:-1] - 1
+        return returns
+    
+    def execute_vectorized(self, index, prices, signals, position_size=1.0, backend='auto'):
+        """Update portfolio for the whole series at once
+        
+        Produces the same holdings and trades as calling update_portfolio
+        for every bar of an initialized portfolio. backend selects the
+        compiled numba kernel or the NumPy fallback (see kernels).
+        """
+        cash, shares, total, trades = execute_fixed(
+            prices, signals, self.initial_capital, position_size, COMMISSION, backend
+        )
+        holdings = shares * np.asarray(prices, dtype=float)
+        self._fill_ledger(index, cash, shares, holdings, total, trades)
+    
+    def execute_all_in(self, index, prices, signals, commission=COMMISSION, backend='auto'):
+        """Update portfolio for the whole series, buying with the full initial capital
+        
+        Positive orders buy as many whole shares as the initial capital
+        affords, negative orders sell the whole position.
+        """
+        cash, shares, total, trades = execute_all_in(
+            prices, signals, self.initial_capital, commission, backend
+        )
+        # Bars without a price keep the last valuation, so holdings come from the totals
+        self._fill_ledger(index, cash, shares, total - cash, total, trades)
+    
+    def execute_orders(self, index, prices, signals, high=None, low=None, open_=None,
+                       sizing=None, fills=None, commission=COMMISSION, backend='auto'):
+        """Update portfolio for the whole series under a sizing and a fill model
+        
+        Long-only: positive orders open a position sized by `sizing`
+        (FixedShares(1) by default), negative orders close it, with orders
+        filled as described by `fills` (market orders at the close by
+        default). Missing High / Low / Open fall back to the close.
+        """
+        sizing = sizing or FixedShares()
+        fills = fills or FillModel()
+        prices = np.asarray(prices, dtype=float)
+        high = prices if high is None else high
+        low = prices if low is None else low
+        open_ = prices if open_ is None else open_
+        
+        cash, shares, total, trades = execute_orders(
+            open_, high, low, prices, signals, *sizing.arrays(prices),
+            initial_capital=self.initial_capital, commission=commission,
+            whole_shares=sizing.whole_shares, backend=backend, **fills.options()
+        )
+        self._fill_ledger(index, cash, shares, shares * prices, total, trades)
+    
+    def _fill_ledger(self, index, cash, shares, holdings, total, trades):
+        """Install the result arrays of a whole-series kernel as the ledger"""
+        ledger = PortfolioLedger(index, self.initial_capital, trade_capacity=0)
+        ledger.cash[:] = cash
+        ledger.holdings[:] = holdings
+        ledger.total[:] = total
+        ledger.trades = trades
+        ledger.trade_count = len(trades)
+        
+        self.ledger = ledger
+        self._frames = {}
+        self.cash = cash[-1] if len(cash) else self.initial_capital
+        self.shares = shares[-1] if len(shares) else 0.0
 
 # Test the portfolio
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+import pandas as pd
+import numpy as np
+import copy
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CACHE_DIR, COMMISSION
+
+# Bump when the layout of cached results changes
+CACHE_VERSION = 1
+
+# Price columns that enter the data digest, matched case-insensitively
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'adj close', 'volume')
+
+class ResultCache:
+    """Content-addressed cache of backtest results
+    
+    Entries are keyed by a hash of the price data, the strategy class and
+    its parameters, the initial capital, the commission and the execution
+    models, so editing the data or any input yields a new key and stale
+    entries are never served. Results are pickled to disk; a small
+    in-memory LRU sits in front, and the least recently used files are
+    evicted once the directory exceeds max_bytes. Every get returns its
+    own copy, so callers may modify the frames of a result without
+    changing the cached one.
+    """
+    
+    def __init__(self, directory=os.path.join(CACHE_DIR, 'results'), max_bytes=512 * 1024 * 1024, memory_items=32):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def __getstate__(self):
+        # Locks cannot be pickled (spawn and forkserver worker pools); a worker
+        # starts with its own lock and an empty in-memory LRU over the same directory
+        state = self.__dict__.copy()
+        del state['lock']
+        state['memory'] = OrderedDict()
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def data_digest(data):
+        """Hash the index and the numeric OHLCV columns of a DataFrame or DataFrame-like view
+        
+        Other columns, such as a ticker or sector label, are left out and do
+        not need to be convertible to numbers.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        index = data.index
+        if isinstance(index, pd.DatetimeIndex):
+            digest.update(str(index.dtype).encode())
+            digest.update(np.ascontiguousarray(index.values.view(np.int64)).tobytes())
+        else:
+            digest.update('\x00'.join(map(str, index)).encode())
+        for column in data.columns:
+            if str(column).lower() not in OHLCV_COLUMNS or not pd.api.types.is_numeric_dtype(data[column]):
+                continue
+            digest.update(str(column).encode())
+            digest.update(np.ascontiguousarray(data[column].to_numpy(dtype=float)).tobytes())
+        return digest.hexdigest()
+    
+    @classmethod
+    def key(cls, data, strategy, initial_capital, commission=COMMISSION, execution=None):
+        """Build the cache key of one backtest
+        
+        execution holds anything else that changes the fills, such as the
+        sizing and fill models; it enters the key through its repr.
+        """
+        strategy_class = type(strategy)
+        inputs = repr((
+            CACHE_VERSION,
+            cls.data_digest(data),
+            f"{strategy_class.__module__}.{strategy_class.__qualname__}",
+            sorted(strategy.parameters.items()),
+            float(initial_capital),
+            float(commission),
+            float(COMMISSION),
+            repr(execution)
+        ))
+        return hashlib.blake2b(inputs.encode(), digest_size=20).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+    
+    def get(self, key):
+        """Return the cached result for a key, or None"""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return copy.deepcopy(self.memory[key])
+        
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            # Mark the file as recently used for eviction
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        
+        self._remember(key, copy.deepcopy(result))
+        return result
+    
+    def put(self, key, result):
+        """Store a result in memory and on disk"""
+        self._remember(key, copy.deepcopy(result))
+        
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        
+        self._evict()
+    
+    def _remember(self, key, result):
+        with self.lock:
+            self.memory[key] = result
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
+    
+    def _evict(self):
+        """Delete the least recently used files until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+    
+    def clear(self):
+        """Drop every cached result"""
+        with self.lock:
+            self.memory.clear()
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.directory, name))
+
+
+# Test the result cache in a spawned process pool
+if __name__ == "__main__":
+    import multiprocessing
+    import tempfile
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from backtester import Backtester
+    from strategies.moving_average_crossover import MovingAverageCrossover
+    
+    # Spawned workers receive the backtester, and with it the cache, pickled
+    multiprocessing.set_start_method('spawn', force=True)
+    
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2015-01-01', periods=2000, name='Date')
+    data = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))}, index=index)
+    grid = {'short_window': [10, 20], 'long_window': [50, 100]}
+    
+    cache = ResultCache(tempfile.mkdtemp())
+    backtester = Backtester(data, MovingAverageCrossover(data), cache=cache)
+    backtester.run_backtest()
+    parallel = backtester.optimize_parameters(grid, n_jobs=2)
+    sequential = backtester.optimize_parameters(grid, n_jobs=1)
+    
+    print(f"Best parameters: {parallel['best_params']}, same as sequential: {parallel['best_params'] == sequential['best_params']}")
+    print(f"Results in the parent's memory cache: {len(cache.memory)}, on disk: {len(os.listdir(cache.directory))}")
\ No newline at end of file
@@ -0,0 +1,143 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+from abc import ABC, abstractmethod
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INITIAL_CAPITAL
+
+# Import from the same directory
+from kernels import MARKET, LIMIT, STOP
+
+ORDER_TYPES = {'market': MARKET, 'limit': LIMIT, 'stop': STOP}
+
+class _ParameterRepr:
+    """Repr listing every attribute, stable enough to enter result-cache keys"""
+    
+    def __repr__(self):
+        params = ', '.join(f"{name}={value!r}" for name, value in sorted(vars(self).items()))
+        return f"{type(self).__name__}({params})"
+
+class SizingModel(_ParameterRepr, ABC):
+    """Base class of the position sizing models used by Portfolio.execute_orders
+    
+    A model describes every entry as shares + (notional + fraction * equity)
+    / price and returns those three terms as per-bar arrays, which keeps
+    sizing inside the vectorized / compiled execution kernels.
+    """
+    
+    def __init__(self, whole_shares=True):
+        self.whole_shares = whole_shares
+    
+    @abstractmethod
+    def arrays(self, close):
+        """Per-bar (shares, notional, fraction) arrays for a close price series"""
+        pass
+
+class FixedShares(SizingModel):
+    """Buy the same number of shares on every entry"""
+    
+    def __init__(self, shares=1.0, whole_shares=False):
+        super().__init__(whole_shares)
+        self.shares = shares
+    
+    def arrays(self, close):
+        zeros = np.zeros(len(close))
+        return np.full(len(close), float(self.shares)), zeros, zeros
+
+class FixedNotional(SizingModel):
+    """Spend the same cash amount, commission included, on every entry"""
+    
+    def __init__(self, notional=INITIAL_CAPITAL, whole_shares=True):
+        super().__init__(whole_shares)
+        self.notional = notional
+    
+    def arrays(self, close):
+        zeros = np.zeros(len(close))
+        return zeros, np.full(len(close), float(self.notional)), zeros
+
+class PercentOfEquity(SizingModel):
+    """Spend a fixed fraction of the current equity on every entry"""
+    
+    def __init__(self, fraction=1.0, whole_shares=True):
+        super().__init__(whole_shares)
+        self.fraction = fraction
+    
+    def arrays(self, close):
+        zeros = np.zeros(len(close))
+        return zeros, zeros, np.full(len(close), float(self.fraction))
+
+class VolatilityTarget(SizingModel):
+    """Size entries so the position runs at a target annualized volatility
+    
+    The fraction of equity invested is target_volatility divided by the
+    realized volatility of the last `lookback` close-to-close returns,
+    capped at max_leverage. Bars before the lookback has filled do not
+    enter.
+    """
+    
+    def __init__(self, target_volatility=0.15, lookback=20, max_leverage=1.0, periods_per_year=252,
+                 whole_shares=True):
+        super().__init__(whole_shares)
+        self.target_volatility = target_volatility
+        self.lookback = lookback
+        self.max_leverage = max_leverage
+        self.periods_per_year = periods_per_year
+    
+    def arrays(self, close):
+        close = pd.Series(np.asarray(close, dtype=float))
+        volatility = close.pct_change().rolling(self.lookback).std() * np.sqrt(self.periods_per_year)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.minimum(self.target_volatility / volatility.to_numpy(), self.max_leverage)
+        fraction = np.where(np.isfinite(fraction), fraction, 0.0)
+        zeros = np.zeros(len(close))
+        return zeros, zeros, fraction
+
+class FillModel(_ParameterRepr):
+    """How orders are filled by Portfolio.execute_orders
+    
+    order_type 'market' fills entries at the signal close; 'limit' and
+    'stop' place the entry offset below / above the signal close and fill
+    on one of the next valid_bars bars whose Low / High reaches the level.
+    slippage is an adverse fraction of the price on market, stop and
+    stop-loss fills. stop_loss and take_profit are fractions of the entry
+    price checked against each bar's Low / High while in a position.
+    """
+    
+    def __init__(self, order_type='market', offset=0.0, valid_bars=1, slippage=0.0, stop_loss=None,
+                 take_profit=None):
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"Unknown order type: {order_type}")
+        if valid_bars < 1:
+            raise ValueError("valid_bars must be at least 1")
+        
+        self.order_type = order_type
+        self.offset = offset
+        self.valid_bars = valid_bars
+        self.slippage = slippage
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+    
+    def options(self):
+        """Keyword arguments of kernels.execute_orders for this model"""
+        return {
+            'slippage': self.slippage,
+            'entry_type': ORDER_TYPES[self.order_type],
+            'offset': self.offset,
+            'valid_bars': self.valid_bars,
+            'stop_loss': self.stop_loss or 0.0,
+            'take_profit': self.take_profit or 0.0
+        }
+
+def bar_range(data, close):
+    """Open, High and Low arrays of the data, falling back to the close where a column is missing"""
+    columns = {str(column).lower(): column for column in data.columns}
+    close = np.asarray(close, dtype=float)
+    arrays = []
+    for name in ('open', 'high', 'low'):
+        column = columns.get(name)
+        arrays.append(close if column is None else data[column].to_numpy(dtype=float))
+    return arrays
@@ -0,0 +1,236 @@
+import pandas as pd
+import numpy as np
+import argparse
+import glob
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SHORT_WINDOW, LONG_WINDOW
+from strategies.moving_average_crossover import rolling_means
+
+# Columns of UniverseScanner.state
+STATE_COLUMNS = ['date', 'close', 'short_mavg', 'long_mavg', 'spread', 'signal', 'crossed', 'last_trade_date',
+                 'last_trade_type', 'last_trade_price', 'bars_since_trade']
+
+class UniverseScanner:
+    """Moving average crossover screen over a whole universe in one pass
+    
+    The close prices of every ticker are aligned into a single (dates x
+    tickers) matrix, the short and long averages of all columns come from
+    one rolling_means call and the crossover signals from one comparison,
+    so the cost grows with the size of the matrix rather than with the
+    number of per-ticker backtests. Per ticker the averages and signals
+    match MovingAverageCrossover.generate_signals on that ticker's bars;
+    dates on which a ticker has no bar carry its previous state.
+    """
+    
+    def __init__(self, closes):
+        self.closes = closes.sort_index()
+    
+    @classmethod
+    def from_frames(cls, frames, column='Close'):
+        """Build the close matrix from a mapping of ticker -> price DataFrame"""
+        return cls(pd.DataFrame({ticker: data[column] for ticker, data in frames.items()}))
+    
+    @classmethod
+    def from_store(cls, store, tickers=None, start=None, end=None):
+        """Build the close matrix straight from the memory-mapped arrays of an OHLCVStore"""
+        tickers = list(store.tickers) if tickers is None else list(tickers)
+        views = [store.get(ticker, start, end) for ticker in tickers]
+        lengths = np.array([len(view) for view in views])
+        
+        dates = np.concatenate([view.index.values for view in views]) if views else np.array([], dtype='datetime64[ns]')
+        closes = np.concatenate([view['Close'].to_numpy() for view in views]) if views else np.array([])
+        
+        # Scatter every ticker's bars into its column of the aligned matrix
+        calendar = np.unique(dates)
+        matrix = np.full((len(calendar), len(tickers)), np.nan)
+        matrix[np.searchsorted(calendar, dates), np.repeat(np.arange(len(tickers)), lengths)] = closes
+        
+        index = pd.DatetimeIndex(calendar, name='Date')
+        return cls(pd.DataFrame(matrix, index=index, columns=pd.Index(tickers, name='Ticker')))
+    
+    @classmethod
+    def from_directory(cls, data_dir='data', tickers=None):
+        """Build the close matrix from the historical_data_<ticker>.csv files of a data directory"""
+        from data.data_loader import DataLoader
+        
+        if tickers is None:
+            paths = sorted(glob.glob(os.path.join(data_dir, 'historical_data_*.csv')))
+            tickers = [os.path.basename(path)[len('historical_data_'):-len('.csv')] for path in paths]
+        frames = {ticker: DataLoader.read_csv(os.path.join(data_dir, f"historical_data_{ticker}.csv"))
+                  for ticker in tickers}
+        return cls.from_frames(frames)
+    
+    def scan(self, short_window=SHORT_WINDOW, long_window=LONG_WINDOW):
+        """Compute averages, signals and orders for every ticker
+        
+        Returns a dict of (dates x tickers) DataFrames: 'short_mavg',
+        'long_mavg', 'signal' and 'positions'.
+        """
+        values = self.closes.to_numpy(dtype=float)
+        bars = len(values)
+        frame = lambda array: pd.DataFrame(array, index=self.closes.index, columns=self.closes.columns, copy=False)
+        self.windows = (short_window, long_window)
+        
+        # Without any dates every frame is empty
+        if not bars:
+            self.result = {name: frame(np.empty(values.shape)) for name in ('short_mavg', 'long_mavg', 'signal', 'positions')}
+            return self.result
+        
+        valid = ~np.isnan(values)
+        
+        short_mavg, long_mavg = rolling_means(values, [short_window, long_window])
+        
+        # Bars seen by each ticker so far, the warmup counts from its first bar
+        first_bar = np.where(valid.any(axis=0), valid.argmax(axis=0), bars)
+        warm = np.arange(bars)[:, None] - first_bar[None, :] >= short_window
+        signal = np.where(warm & (short_mavg > long_mavg), 1.0, 0.0)
+        
+        # Tickers missing dates between their first and last bar need windows
+        # over their own bars, so pack those columns' bars together first
+        last_bar = bars - 1 - valid[::-1].argmax(axis=0)
+        gapped = np.flatnonzero(valid.any(axis=0) & (valid.sum(axis=0) < last_bar - first_bar + 1))
+        if len(gapped):
+            order = np.argsort(~valid[:, gapped], axis=0, kind='stable')
+            packed = np.take_along_axis(values[:, gapped], order, axis=0)
+            packed_short, packed_long = rolling_means(packed, [short_window, long_window])
+            packed_signal = np.where(
+                (np.arange(bars)[:, None] >= short_window) & (packed_short > packed_long), 1.0, 0.0
+            )
+            for target, source in ((short_mavg, packed_short), (long_mavg, packed_long), (signal, packed_signal)):
+                unpacked = np.empty_like(source)
+                np.put_along_axis(unpacked, order, source, axis=0)
+                target[:, gapped] = unpacked
+        
+        short_mavg[~valid] = np.nan
+        long_mavg[~valid] = np.nan
+        
+        # Hold the previous state on dates without a bar, and stay flat before the first one
+        signal[~valid] = np.nan
+        signal = pd.DataFrame(signal).ffill().fillna(0.0).to_numpy()
+        
+        positions = np.empty_like(signal)
+        positions[0] = np.nan
+        positions[1:] = np.diff(signal, axis=0)
+        
+        self.result = {
+            'short_mavg': frame(short_mavg),
+            'long_mavg': frame(long_mavg),
+            'signal': frame(signal),
+            'positions': frame(positions)
+        }
+        return self.result
+    
+    def state(self):
+        """Current crossover state and latest trade of every ticker, one row per ticker"""
+        result = self.result
+        values = self.closes.to_numpy(dtype=float)
+        bars, tickers = values.shape
+        columns = np.arange(tickers)
+        dates = self.closes.index
+        
+        # Without any dates no ticker has a state
+        if not bars:
+            return pd.DataFrame(columns=STATE_COLUMNS, index=self.closes.columns[:0])
+        
+        # Each ticker's own latest bar
+        valid = ~np.isnan(values)
+        last_bar = np.where(valid.any(axis=0), bars - 1 - valid[::-1].argmax(axis=0), 0)
+        
+        # Latest non-zero order of each ticker
+        orders = np.nan_to_num(result['positions'].to_numpy())
+        traded = orders != 0
+        has_trade = traded.any(axis=0)
+        last_trade = np.where(has_trade, bars - 1 - traded[::-1].argmax(axis=0), 0)
+        
+        short_mavg = result['short_mavg'].to_numpy()[last_bar, columns]
+        long_mavg = result['long_mavg'].to_numpy()[last_bar, columns]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = short_mavg / long_mavg - 1
+        
+        state = pd.DataFrame({
+            'date': dates[last_bar],
+            'close': values[last_bar, columns],
+            'short_mavg': short_mavg,
+            'long_mavg': long_mavg,
+            'spread': spread,
+            'signal': result['signal'].to_numpy()[last_bar, columns],
+            'crossed': has_trade & (last_trade == last_bar),
+            'last_trade_date': pd.Series(dates[last_trade]).where(has_trade).to_numpy(),
+            'last_trade_type': np.where(has_trade, np.where(orders[last_trade, columns] > 0, 'BUY', 'SELL'), None),
+            'last_trade_price': np.where(has_trade, values[last_trade, columns], np.nan),
+            'bars_since_trade': np.where(has_trade, last_bar - last_trade, -1)
+        }, index=self.closes.columns)
+        
+        # Tickers without a single bar have no state
+        return state[valid.any(axis=0)]
+    
+    def trades(self, last_bars=None, since=None):
+        """Every crossover in the last `last_bars` bars or since a date, newest first"""
+        orders = self.result['positions']
+        if since is not None:
+            orders = orders[orders.index >= pd.Timestamp(since)]
+        elif last_bars is not None:
+            orders = orders.iloc[-last_bars:]
+        
+        rows, columns = np.nonzero(np.nan_to_num(orders.to_numpy()))
+        trades = pd.DataFrame({
+            'date': orders.index[rows],
+            'ticker': orders.columns[columns],
+            'type': np.where(orders.to_numpy()[rows, columns] > 0, 'BUY', 'SELL'),
+            'price': self.closes.loc[orders.index].to_numpy()[rows, columns]
+        })
+        return trades.sort_values(['date', 'ticker'], ascending=[False, True], ignore_index=True)
+
+def synthetic_universe(tickers=5000, bars=2520, seed=0):
+    """Random-walk close matrix for demos and timing, with staggered listing dates"""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (bars, tickers)), axis=0))
+    listed = rng.integers(0, bars // 4, tickers)
+    closes[np.arange(bars)[:, None] < listed[None, :]] = np.nan
+    index = pd.bdate_range('2014-01-01', periods=bars, name='Date')
+    return pd.DataFrame(closes, index=index, columns=pd.Index([f"SYM{i:04d}" for i in range(tickers)], name='Ticker'))
+
+# Screen a universe from the command line
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Moving average crossover screen over a universe of tickers")
+    parser.add_argument('--store', help="OHLCVStore directory to scan")
+    parser.add_argument('--data-dir', help="directory of historical_data_<ticker>.csv files to scan")
+    parser.add_argument('--tickers', nargs='+', help="limit the scan to these tickers")
+    parser.add_argument('--start', help="first date to load")
+    parser.add_argument('--short', type=int, default=SHORT_WINDOW, help="short moving average window")
+    parser.add_argument('--long', type=int, default=LONG_WINDOW, help="long moving average window")
+    parser.add_argument('--last-bars', type=int, default=5, help="list the crossovers of the last N bars")
+    parser.add_argument('--output', help="write the per-ticker state to this CSV file")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    if args.store:
+        from data.ohlcv_store import OHLCVStore
+        scanner = UniverseScanner.from_store(OHLCVStore(args.store), args.tickers, args.start)
+    elif args.data_dir:
+        scanner = UniverseScanner.from_directory(args.data_dir, args.tickers)
+    else:
+        print("No --store or --data-dir given, scanning a synthetic universe of 5,000 tickers")
+        scanner = UniverseScanner(synthetic_universe())
+    loaded = time.perf_counter()
+    
+    scanner.scan(args.short, args.long)
+    state = scanner.state()
+    trades = scanner.trades(last_bars=args.last_bars)
+    scanned = time.perf_counter()
+    
+    bars, tickers = scanner.closes.shape
+    print(f"Loaded {tickers:,} tickers x {bars:,} dates in {loaded - start:.2f}s, scanned in {scanned - loaded:.2f}s")
+    print(f"\n{int(state['signal'].sum()):,} tickers long, {int(state['crossed'].sum()):,} crossed on their latest bar")
+    print(f"\nCrossovers in the last {args.last_bars} bars:")
+    print(trades.head(20))
+    
+    if args.output:
+        state.to_csv(args.output)
+        print(f"\nState saved to {args.output}")
@@ -0,0 +1,149 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import COMMISSION
+
+# Import from the same directory
+from portfolio import Portfolio
+from performance import PerformanceMetrics, BatchPerformanceMetrics
+from worker_pool import map_shared
+
+from strategies.moving_average_crossover import crossover_signals
+
+def _optimize_in_worker(optimizer, fold):
+    """Optimize one fold in a worker process"""
+    return optimizer.optimize_fold(*fold)
+
+class WalkForwardOptimizer:
+    """Walk-forward analysis of MovingAverageCrossover parameters
+    
+    The series is split into in-sample / out-of-sample folds, either rolling
+    (fixed-length in-sample window) or anchored (in-sample always starts at
+    the first bar). Parameters are chosen on each in-sample fold by Sharpe
+    ratio and then traded on the following out-of-sample fold. The moving
+    averages of every window in the grid are computed once for the whole
+    series and only sliced per fold.
+    
+    Every out-of-sample fold starts flat, so a position still open at the
+    end of a fold is closed there and pays the exit commission before the
+    next fold re-enters it.
+    """
+    
+    def __init__(self, strategy, parameter_grid, in_sample, out_of_sample, anchored=False,
+                 initial_capital=10000.0, n_jobs=1):
+        missing = [name for name in ('short_window', 'long_window') if name not in parameter_grid]
+        if missing:
+            raise ValueError(f"Walk-forward parameter grid is missing {', '.join(missing)}")
+        
+        self.strategy = strategy
+        self.pairs = [
+            (short, long)
+            for short in parameter_grid['short_window']
+            for long in parameter_grid['long_window']
+        ]
+        self.in_sample = in_sample
+        self.out_of_sample = out_of_sample
+        self.anchored = anchored
+        self.initial_capital = initial_capital
+        self.n_jobs = n_jobs
+        
+        # Indicators for the full series, reused by every fold
+        close_data = strategy._close_data()
+        self.index = close_data.index
+        self.prices = close_data.to_numpy(dtype=float)
+        self.windows = sorted({window for pair in self.pairs for window in pair})
+        self.means = strategy.batch_moving_averages(self.windows)
+    
+    def folds(self):
+        """List the (in-sample start, out-of-sample start, out-of-sample end) bar positions"""
+        folds = []
+        bars = len(self.prices)
+        oos_start = self.in_sample
+        while oos_start < bars:
+            is_start = 0 if self.anchored else oos_start - self.in_sample
+            folds.append((is_start, oos_start, min(oos_start + self.out_of_sample, bars)))
+            oos_start += self.out_of_sample
+        return folds
+    
+    def optimize_fold(self, is_start, oos_start, oos_end):
+        """Pick the pair with the best in-sample Sharpe ratio"""
+        signal = crossover_signals(self.means, self.windows, self.pairs, is_start, oos_start)
+        total = Portfolio.simulate_signals(self.prices[is_start:oos_start], signal, self.initial_capital)
+        scores = BatchPerformanceMetrics(Portfolio.equity_returns(total)).calculate_metrics()['sharpe_ratio']
+        
+        best = int(np.nanargmax(scores)) if not np.isnan(scores).all() else 0
+        return self.pairs[best], scores[best]
+    
+    def run(self):
+        """Run every fold and stitch the out-of-sample equity curves together"""
+        folds = self.folds()
+        if not folds:
+            raise ValueError("Not enough data for a single in-sample / out-of-sample fold")
+        
+        n_jobs = self.n_jobs
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, len(folds))
+        
+        if n_jobs <= 1:
+            choices = [self.optimize_fold(*fold) for fold in folds]
+        else:
+            choices = self._optimize_in_pool(folds, n_jobs)
+        
+        # Trade each fold's parameters out of sample, carrying the capital forward
+        capital = self.initial_capital
+        equity = []
+        records = []
+        for fold, ((is_start, oos_start, oos_end), (pair, score)) in enumerate(zip(folds, choices)):
+            signal = crossover_signals(self.means, self.windows, [pair], oos_start, oos_end)
+            total = Portfolio.simulate_signals(self.prices[oos_start:oos_end], signal, capital)[:, 0]
+            if fold < len(folds) - 1:
+                # Close the position held into the fold boundary, the next fold starts flat
+                total[-1] -= abs(signal[-1, 0]) * self.prices[oos_end - 1] * COMMISSION
+            equity.append(total)
+            
+            records.append({
+                'in_sample_start': self.index[is_start],
+                'in_sample_end': self.index[oos_start - 1],
+                'out_of_sample_start': self.index[oos_start],
+                'out_of_sample_end': self.index[oos_end - 1],
+                'short_window': pair[0],
+                'long_window': pair[1],
+                'in_sample_sharpe': score,
+                'out_of_sample_return': total[-1] / capital - 1
+            })
+            capital = total[-1]
+        
+        first_bar = folds[0][1]
+        equity = pd.Series(np.concatenate(equity), index=self.index[first_bar:], name='total')
+        returns = equity.pct_change()
+        returns.iloc[0] = equity.iloc[0] / self.initial_capital - 1
+        
+        return {
+            'folds': pd.DataFrame(records),
+            'equity': equity,
+            'performance': PerformanceMetrics(returns)
+        }
+    
+    def _optimize_in_pool(self, folds, n_jobs):
+        """Optimize folds in a process pool, preserving fold order"""
+        return map_shared(_optimize_in_worker, self, folds, n_jobs)
+
+# Test the walk-forward optimizer
+if __name__ == "__main__":
+    from data.data_loader import DataLoader
+    from strategies.moving_average_crossover import MovingAverageCrossover
+    
+    data = DataLoader().load_data()
+    strategy = MovingAverageCrossover(data)
+    grid = {'short_window': [10, 20, 50], 'long_window': [100, 150, 200]}
+    
+    results = WalkForwardOptimizer(strategy, grid, in_sample=504, out_of_sample=126).run()
+    
+    print(results['folds'])
+    print(results['performance'].generate_report())
@@ -0,0 +1,58 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Object shared by the worker processes of the running pool
+_worker_shared = None
+
+def _init_worker(shared):
+    """Install the shared object in a worker process"""
+    global _worker_shared
+    _worker_shared = shared
+
+def _call_in_worker(function, item):
+    return function(_worker_shared, item)
+
+def map_shared(function, shared, items, n_jobs, chunksize=1, context=None):
+    """Return [function(shared, item) for item in items] computed in a process pool
+    
+    The shared object (a backtester, an optimizer with precomputed
+    indicators, ...) reaches every worker once rather than with every
+    task: forked workers inherit it without any pickling, spawn and
+    forkserver workers unpickle it in the pool initializer, so it must be
+    picklable. function must be a module-level function. Results keep
+    the order of items.
+    """
+    context = context or multiprocessing.get_context()
+    if context.get_start_method() == 'fork':
+        _init_worker(shared)
+        executor = ProcessPoolExecutor(max_workers=n_jobs, mp_context=context)
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=n_jobs, mp_context=context,
+            initializer=_init_worker, initargs=(shared,)
+        )
+    
+    try:
+        with executor:
+            return list(executor.map(partial(_call_in_worker, function), items, chunksize=chunksize))
+    finally:
+        _init_worker(None)
+
+def _scaled_sum(weights, scale):
+    return float(np.sum(weights) * scale)
+
+# Test the pool under every start method
+if __name__ == "__main__":
+    weights = np.arange(1000.0)
+    expected = [_scaled_sum(weights, scale) for scale in range(8)]
+    for method in multiprocessing.get_all_start_methods():
+        results = map_shared(_scaled_sum, weights, range(8), n_jobs=2, context=multiprocessing.get_context(method))
+        print(f"{method}: {results == expected}")
\ No newline at end of file
@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add the project root and the backtester directory to the Python path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'backtester'))
+
+from backtester import Backtester
+from portfolio import Portfolio
+from performance import PerformanceMetrics
+from data.data_loader import DataLoader
+from data.bulk_downloader import DownloadCheckpoint
+from strategies.moving_average_crossover import MovingAverageCrossover
+from strategies.indicator_cache import IndicatorCache
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Throughput may drop / peak memory may grow by this fraction before it counts as a regression
+TOLERANCE = 0.25
+
+# Scratch files such as the CSVs read by the load_data benchmarks, removed at exit
+WORK_DIR = tempfile.TemporaryDirectory(prefix='bench_')
+
+def synthetic_ohlcv(bars, seed=0):
+    """Random-walk OHLCV bars at one-minute spacing, so 10M bars still fit in the Timestamp range"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    spread = np.abs(rng.normal(0, 0.002, bars))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.001, bars)),
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(1_000, 100_000, bars).astype(float)
+    }, index=pd.date_range('2000-01-03', periods=bars, freq='min', name='Date'))
+
+class Benchmark:
+    """One timed stage of the engine
+    
+    setup(data) builds whatever the stage needs and returns a callable that
+    runs the stage once; only that callable is timed. max_bars skips sizes
+    at which a stage would take minutes, such as per-bar Python loops.
+    """
+    
+    def __init__(self, name, setup, max_bars=None):
+        self.name = name
+        self.setup = setup
+        self.max_bars = max_bars
+
+def _setup_load_data(data, cached):
+    directory = tempfile.mkdtemp(prefix='load_', dir=WORK_DIR.name)
+    loader = DataLoader('BENCH', start_date=str(data.index[0].date()),
+                        end_date=str(data.index[-1].date() + pd.Timedelta(days=1)),
+                        cache_dir=directory)
+    loader.data_path = os.path.join(directory, 'historical_data_BENCH.csv')
+    loader.checkpoint = DownloadCheckpoint(os.path.join(directory, 'download_checkpoint.json'))
+    data.to_csv(loader.data_path)
+    
+    if cached:
+        loader.load_data()
+        return loader.load_data
+    
+    def load_csv():
+        if os.path.exists(loader.cache_path):
+            os.remove(loader.cache_path)
+        return loader.load_data()
+    return load_csv
+
+def _setup_generate_signals(data):
+    strategy = MovingAverageCrossover(data)
+    
+    def generate():
+        # Time the indicators themselves, not cache hits from the previous repeat
+        IndicatorCache.for_data(data).clear()
+        return strategy.generate_signals()
+    return generate
+
+def _setup_run_backtest(data):
+    backtester = Backtester(data, MovingAverageCrossover(data))
+    return backtester.run_backtest
+
+def _setup_update_portfolio(data):
+    signals = MovingAverageCrossover(data).generate_signals()
+    dates = signals.index
+    prices = signals['price'].to_numpy()
+    orders = signals['positions'].fillna(0).to_numpy()
+    
+    def update():
+        portfolio = Portfolio()
+        portfolio.initialize_portfolio(dates)
+        for date, price, order in zip(dates, prices, orders):
+            portfolio.update_portfolio(date, price, order)
+        return portfolio
+    return update
+
+def _setup_calculate_metrics(data):
+    returns = data['Close'].pct_change().fillna(0)
+    benchmark = data['Open'].pct_change().fillna(0)
+    return PerformanceMetrics(returns, benchmark).calculate_metrics
+
+def _setup_optimize_parameters(data):
+    backtester = Backtester(data, MovingAverageCrossover(data))
+    grid = {'short_window': [10, 20, 50], 'long_window': [100, 150, 200]}
+    return lambda: backtester.optimize_parameters(grid)
+
+BENCHMARKS = [
+    Benchmark('load_data_csv', lambda data: _setup_load_data(data, cached=False), max_bars=1_000_000),
+    Benchmark('load_data_cached', lambda data: _setup_load_data(data, cached=True), max_bars=1_000_000),
+    Benchmark('generate_signals', _setup_generate_signals),
+    Benchmark('run_backtest', _setup_run_backtest),
+    Benchmark('update_portfolio', _setup_update_portfolio, max_bars=1_000_000),
+    Benchmark('calculate_metrics', _setup_calculate_metrics),
+    Benchmark('optimize_parameters', _setup_optimize_parameters, max_bars=1_000_000),
+]
+
+def measure(benchmark, data, repeat=3):
+    """Best-of-repeat throughput and tracemalloc peak of one stage at one size"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = benchmark.setup(data)
+        
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        
+        # Separate run for memory, tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    seconds = min(timings)
+    return {
+        'seconds': seconds,
+        'bars_per_sec': len(data) / seconds,
+        'peak_mb': peak / 2 ** 20
+    }
+
+def run_suite(sizes=SIZES, names=None, repeat=3):
+    """Measure every selected benchmark at every size, keyed 'name@bars'"""
+    results = {}
+    for bars in sizes:
+        data = synthetic_ohlcv(bars)
+        for benchmark in BENCHMARKS:
+            if names and benchmark.name not in names:
+                continue
+            if benchmark.max_bars is not None and bars > benchmark.max_bars:
+                continue
+            
+            result = measure(benchmark, data, repeat)
+            results[f"{benchmark.name}@{bars}"] = result
+            print(f"{benchmark.name:<20} {bars:>11,} bars  {result['bars_per_sec']:>15,.0f} bars/s  "
+                  f"{result['peak_mb']:>9.1f} MB peak")
+    return results
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """List the results that are slower or use more memory than the baseline allows"""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        
+        speed = result['bars_per_sec'] / reference['bars_per_sec']
+        if speed < 1 - tolerance:
+            regressions.append(f"{key}: throughput {speed:.2f}x baseline")
+        # Ignore sub-megabyte growth, small peaks are dominated by noise
+        growth = result['peak_mb'] - reference['peak_mb']
+        if growth > 1 and growth > reference['peak_mb'] * tolerance:
+            regressions.append(f"{key}: peak memory {result['peak_mb'] / reference['peak_mb']:.2f}x baseline")
+    return regressions
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)['results']
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Merge results into the baseline file, keeping entries for sizes not run this time"""
+    merged = load_baseline(path) or {}
+    merged.update(results)
+    with open(path, 'w') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.platform(),
+            'results': merged
+        }, f, indent=1, sort_keys=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the backtest engine on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="bar counts to run")
+    parser.add_argument('--only', nargs='+', help="benchmark names to run")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per benchmark, the best counts")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="allowed slowdown / memory growth")
+    parser.add_argument('--save', action='store_true', help="record the results as the new baseline")
+    args = parser.parse_args()
+    
+    results = run_suite(args.sizes, args.only, args.repeat)
+    
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    
+    if baseline:
+        for key, result in results.items():
+            if key in baseline:
+                print(f"{key:<32} {result['bars_per_sec'] / baseline[key]['bars_per_sec']:.2f}x baseline throughput")
+    
+    if regressions:
+        print("Regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    elif baseline:
+        print("No regressions against the baseline")
@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Project root and backtester directory, put on the path of every measured interpreter
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = [ROOT, os.path.join(ROOT, 'backtester')]
+
+# Modules every backtest or sweep worker loads, and the ones behind optional features
+CORE_MODULES = [
+    'config',
+    'data.data_loader',
+    'strategies.moving_average_crossover',
+    'kernels',
+    'portfolio',
+    'performance',
+    'backtester',
+    'chunked_backtester',
+    'universe_scanner',
+]
+FEATURE_MODULES = [
+    'utils.visualizations',
+    'main',
+    'simple_backtest',
+]
+
+# Libraries that must only load when plotting, downloading or compiling is actually used
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'yfinance', 'scipy', 'numba', 'sklearn', 'statsmodels']
+
+# Seconds a core module may take to import in a fresh interpreter
+STARTUP_BUDGET = 1.0
+
+# Runs in a fresh interpreter: time one import and report which heavy libraries it pulled in
+PROBE = """
+import json, sys, time
+sys.path[:0] = {paths!r}
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=3):
+    """Best-of-repeat import time of a module in fresh interpreters, and the heavy libraries it loads"""
+    best = None
+    for _ in range(repeat):
+        probe = PROBE.format(paths=PATHS, module=module, heavy=HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True, cwd=ROOT)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+def interpreter_startup(repeat=3):
+    """Best-of-repeat wall time of an interpreter that imports nothing, the floor under every process"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def slowest_imports(module, limit=5):
+    """The direct imports that dominate a module's import time, from python -X importtime"""
+    probe = f"import sys; sys.path[:0] = {PATHS!r}; import {module}"
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe], capture_output=True, text=True, cwd=ROOT)
+    
+    # Lines read 'import time: <self us> | <cumulative us> | <name>', indented two spaces per
+    # level and printed after their own imports, so a module's children come right before it
+    children = []
+    for line in output.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        if depth == 1:
+            children.append((int(fields[1]) / 1e6, name.strip()))
+        elif depth == 0:
+            if name == module:
+                return sorted(children, reverse=True)[:limit]
+            children = []
+    return []
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time of the engine modules in fresh interpreters")
+    parser.add_argument('--repeat', type=int, default=3, help="fresh interpreters per module, the fastest counts")
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET, help="seconds a core module may take")
+    parser.add_argument('--top', type=int, default=0, help="list the N slowest imports of every module")
+    args = parser.parse_args()
+    
+    print(f"{'python':<8} {'(no imports)':<38} {interpreter_startup(args.repeat):>7.3f}s  wall time of a bare interpreter")
+    
+    failures = []
+    for group, modules in (('core', CORE_MODULES), ('feature', FEATURE_MODULES)):
+        for module in modules:
+            result = measure_import(module, args.repeat)
+            heavy = ', '.join(result['heavy']) or '-'
+            print(f"{group:<8} {module:<38} {result['seconds']:>7.3f}s  heavy: {heavy}")
+            
+            for seconds, name in slowest_imports(module, args.top) if args.top else []:
+                print(f"{'':<48} {seconds:>7.3f}s  {name}")
+            
+            if group == 'core':
+                if result['heavy']:
+                    failures.append(f"{module} imports {heavy}")
+                if result['seconds'] > args.budget:
+                    failures.append(f"{module} takes {result['seconds']:.2f}s to import (budget {args.budget:.2f}s)")
+    
+    if failures:
+        print("Startup regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"Every core module imports within {args.budget:.2f}s without optional heavy libraries")
\ No newline at end of file
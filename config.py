@@ -5,6 +5,8 @@ TICKER = "MSFT"  # The stock to analyze
 START_DATE = "2020-01-01"  # Start date for historical data
 END_DATE = "2023-12-31"    # End date for historical data
 DATA_PATH = f"data/historical_data_{TICKER}.csv"  # Path to store/load data
+CACHE_DIR = "data/cache"   # Binary copies of parsed price files
+CHUNK_SIZE = 100_000       # Bars per block when streaming price files too large for memory
 
 # Strategy parameters
 SHORT_WINDOW = 50   # Short moving average window
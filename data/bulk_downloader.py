@@ -0,0 +1,230 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import START_DATE, END_DATE
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts up to `burst`"""
+    
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class YFinanceSource:
+    """Download daily bars from Yahoo Finance"""
+    
+    host = 'query1.finance.yahoo.com'
+    
+    def fetch(self, ticker, start, end):
+        import yfinance as yf
+        return yf.download(ticker, start=start, end=end, progress=False)
+
+class StubSource:
+    """Offline stand-in for YFinanceSource
+    
+    Serves the given frames, or a deterministic random walk for any other
+    ticker, clipped to the requested dates. fail_first makes the first
+    requests of each ticker raise, to exercise the retry logic.
+    """
+    
+    host = 'stub'
+    
+    def __init__(self, frames=None, fail_first=0, latency=0.0):
+        self.frames = frames or {}
+        self.fail_first = fail_first
+        self.latency = latency
+        self.calls = {}
+        self.lock = threading.Lock()
+    
+    def fetch(self, ticker, start, end):
+        with self.lock:
+            self.calls[ticker] = self.calls.get(ticker, 0) + 1
+            attempt = self.calls[ticker]
+        if self.latency:
+            time.sleep(self.latency)
+        if attempt <= self.fail_first:
+            raise ConnectionError(f"Stub failure {attempt} for {ticker}")
+        
+        data = self.frames.get(ticker)
+        if data is None:
+            data = self._random_walk(ticker, start, end)
+        return data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+    
+    @staticmethod
+    def _random_walk(ticker, start, end):
+        dates = pd.bdate_range(start, end, name='Date')
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        return pd.DataFrame({
+            'Close': close,
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Open': close,
+            'Volume': rng.integers(1_000_000, 10_000_000, len(dates)).astype(float)
+        }, index=dates)
+
+class DownloadCheckpoint:
+    """JSON record of the tickers and date ranges already on disk
+    
+    Several checkpoints may share one file (a DataLoader and a
+    BulkDownloader, say): record() merges the entries on disk before
+    writing, and instances on the same path in one process share a lock.
+    """
+    
+    # Absolute path -> lock shared by every checkpoint on that file
+    _locks = {}
+    _locks_lock = threading.Lock()
+    
+    def __init__(self, path):
+        self.path = path
+        with self._locks_lock:
+            self.lock = self._locks.setdefault(os.path.abspath(path), threading.Lock())
+        self.entries = self._read()
+    
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+    
+    def covers(self, ticker, start, end):
+        """Whether a previous download of the ticker spans [start, end)"""
+        entry = self.entries.get(ticker)
+        return (entry is not None and os.path.exists(entry['path'])
+                and entry['start'] <= start and entry['end'] >= end)
+    
+    def record(self, ticker, start, end, path, rows):
+        """Record a finished download and flush the checkpoint to disk"""
+        with self.lock:
+            # Keep what other checkpoints on the same file recorded since this one was read
+            self.entries = {**self.entries, **self._read()}
+            self.entries[ticker] = {'start': start, 'end': end, 'path': path, 'rows': rows}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+class BulkDownloader:
+    """Download many tickers concurrently with rate limiting, retries and resume
+    
+    Requests go through a bounded thread pool and a token bucket per source
+    host. Failed requests are retried with exponential backoff, and every
+    finished ticker is recorded in a checkpoint so an interrupted run only
+    downloads what is still missing when restarted.
+    """
+    
+    def __init__(self, source=None, data_dir='data', max_workers=8, requests_per_second=2.0,
+                 max_retries=3, backoff=1.0, checkpoint_path=None):
+        self.source = source or YFinanceSource()
+        self.data_dir = data_dir
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.checkpoint = DownloadCheckpoint(checkpoint_path or os.path.join(data_dir, 'download_checkpoint.json'))
+        self.requests_per_second = requests_per_second
+        self.limiters = {}
+        self.limiters_lock = threading.Lock()
+    
+    def _limiter(self, host):
+        """Return the rate limiter shared by all requests to a host"""
+        with self.limiters_lock:
+            if host not in self.limiters:
+                self.limiters[host] = RateLimiter(self.requests_per_second)
+            return self.limiters[host]
+    
+    def data_path(self, ticker):
+        return os.path.join(self.data_dir, f"historical_data_{ticker}.csv")
+    
+    def download(self, tickers, start_date=START_DATE, end_date=END_DATE):
+        """Download all tickers not yet covered by the checkpoint"""
+        pending = [ticker for ticker in tickers if not self.checkpoint.covers(ticker, start_date, end_date)]
+        pending_set = set(pending)
+        summary = {
+            'downloaded': [],
+            'skipped': [ticker for ticker in tickers if ticker not in pending_set],
+            'failed': {}
+        }
+        
+        print(f"Downloading {len(pending)} of {len(tickers)} tickers with {self.max_workers} workers...")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            outcomes = executor.map(lambda ticker: self._download_one(ticker, start_date, end_date), pending)
+            for ticker, error in zip(pending, outcomes):
+                if error is None:
+                    summary['downloaded'].append(ticker)
+                else:
+                    summary['failed'][ticker] = error
+        
+        print(f"Downloaded {len(summary['downloaded'])}, skipped {len(summary['skipped'])}, failed {len(summary['failed'])}")
+        return summary
+    
+    def _download_one(self, ticker, start_date, end_date):
+        """Fetch and store one ticker, returning an error message on failure"""
+        limiter = self._limiter(self.source.host)
+        error = None
+        
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            limiter.acquire()
+            try:
+                data = self.source.fetch(ticker, start_date, end_date)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            
+            if data is None or data.empty:
+                error = f"No data returned for {ticker}"
+                continue
+            
+            path = self.data_path(ticker)
+            os.makedirs(self.data_dir, exist_ok=True)
+            data.to_csv(path)
+            self.checkpoint.record(ticker, start_date, end_date, path, len(data))
+            return None
+        
+        return error
+
+# Test the bulk downloader against the offline stub
+if __name__ == "__main__":
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as directory:
+        tickers = [f"SYM{i}" for i in range(20)]
+        downloader = BulkDownloader(StubSource(fail_first=1, latency=0.05), data_dir=directory,
+                                    max_workers=4, requests_per_second=50, backoff=0.01)
+        
+        start = time.perf_counter()
+        print(downloader.download(tickers))
+        print(f"First run took {time.perf_counter() - start:.2f}s")
+        
+        # A second run resumes from the checkpoint and fetches nothing
+        print(downloader.download(tickers))
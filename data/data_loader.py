@@ -1,44 +1,312 @@
 import pandas as pd
-import yfinance as yf
+import numpy as np
+import hashlib
 import os
 import sys
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import TICKER, START_DATE, END_DATE, DATA_PATH
+from config import TICKER, START_DATE, END_DATE, DATA_PATH, CACHE_DIR, CHUNK_SIZE
+from data.bulk_downloader import BulkDownloader, DownloadCheckpoint, YFinanceSource
 
 class DataLoader:
-    def __init__(self, ticker=TICKER, start_date=START_DATE, end_date=END_DATE):
+    def __init__(self, ticker=TICKER, start_date=START_DATE, end_date=END_DATE, cache_dir=CACHE_DIR, source=None):
         self.ticker = ticker
         self.start_date = start_date
         self.end_date = end_date
         self.data_path = f"data/historical_data_{self.ticker}.csv"
+        self.cache_path = os.path.join(cache_dir, f"historical_data_{self.ticker}.npz") if cache_dir else None
+        self.source = source or YFinanceSource()
+        self.checkpoint = DownloadCheckpoint(os.path.join(os.path.dirname(self.data_path), 'download_checkpoint.json'))
         self.data = None
         
     def download_data(self):
         """Download historical data from Yahoo Finance"""
         print(f"Downloading data for {self.ticker} from {self.start_date} to {self.end_date}...")
-        data = yf.download(self.ticker, start=self.start_date, end=self.end_date)
+        data = self.source.fetch(self.ticker, self.start_date, self.end_date)
         
         # Save to CSV
         os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
         data.to_csv(self.data_path)
+        if not data.empty:
+            self.checkpoint.record(self.ticker, self.start_date, self.end_date, self.data_path, len(data))
         print(f"Data saved to {self.data_path}")
         
         return data
     
-    def load_data(self):
-        """Load historical data from CSV"""
+    def covered_range(self):
+        """Date range [start, end) the data file covers
+        
+        Taken from the download checkpoint, or from the first and last bar
+        of the file when it was created before ranges were recorded.
+        """
+        entry = self.checkpoint.entries.get(self.ticker)
+        if entry is not None and entry['path'] == self.data_path:
+            return pd.Timestamp(entry['start']), pd.Timestamp(entry['end'])
+        
+        bounds = self._read_date_bounds()
+        if bounds is None:
+            return None
+        return bounds[0].normalize(), bounds[1].normalize() + pd.Timedelta(days=1)
+    
+    def refresh_data(self):
+        """Fetch only the bars missing before or after the covered range
+        
+        Tail bars are appended to the CSV in place; head bars have to be
+        written in front of the existing rows. Returns the number of bars
+        added.
+        """
+        covered = self.covered_range()
+        if covered is None:
+            return len(self.download_data())
+        
+        start, end = pd.Timestamp(self.start_date), pd.Timestamp(self.end_date)
+        covered_start, covered_end = covered
+        if start >= covered_start and end <= covered_end:
+            return 0
+        
+        # Never duplicate bars that are already in the file
+        first_bar, last_bar = self._read_date_bounds()
+        head = tail = None
+        try:
+            if start < covered_start:
+                print(f"Fetching {self.ticker} bars from {start.date()} to {covered_start.date()}...")
+                head = self._fetch(start, covered_start)
+            if end > covered_end:
+                print(f"Fetching {self.ticker} bars from {covered_end.date()} to {end.date()}...")
+                tail = self._fetch(covered_end, end)
+        except Exception as e:
+            print(f"Error refreshing data for {self.ticker}: {e}")
+            return 0
+        
+        # Coverage only grows to the bars actually received, an empty fetch
+        # (e.g. yfinance offline) leaves the range to be fetched next time
+        received_start, received_end = covered_start, covered_end
+        added = 0
+        if tail is not None and not tail.empty:
+            received_end = max(covered_end, tail.index[-1].normalize() + pd.Timedelta(days=1))
+            tail = tail[tail.index > last_bar]
+            if not tail.empty:
+                self._append_rows(tail)
+                added += len(tail)
+        if head is not None and not head.empty:
+            received_start = min(covered_start, head.index[0].normalize())
+            head = head[head.index < first_bar]
+            if not head.empty:
+                self._prepend_rows(head)
+                added += len(head)
+        
+        if (received_start, received_end) == covered:
+            return added
+        
+        entry = self.checkpoint.entries.get(self.ticker) or {}
+        rows = entry['rows'] + added if entry.get('rows') is not None else self._count_bars()
+        self.checkpoint.record(
+            self.ticker,
+            received_start.strftime('%Y-%m-%d'),
+            received_end.strftime('%Y-%m-%d'),
+            self.data_path,
+            rows
+        )
+        return added
+    
+    def _fetch(self, start, end):
+        """Fetch bars in [start, end) with the file's flat column layout"""
+        data = self.source.fetch(self.ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        return data
+    
+    @staticmethod
+    def _is_bar(line):
+        """Whether a CSV line holds a bar rather than a header row"""
+        return not pd.isna(pd.to_datetime(line.split(',', 1)[0], errors='coerce', format='ISO8601'))
+    
+    def _read_header(self):
+        """Read the header lines (yfinance writes up to three) and the first bar line"""
+        header = []
+        with open(self.data_path) as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if header and self._is_bar(line):
+                    return header, line
+                header.append(line)
+        return header, None
+    
+    def _read_last_line(self):
+        """Read the last non-empty line without scanning the whole file"""
+        with open(self.data_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            block = b''
+            while position > 0 and block.rstrip(b'\n').count(b'\n') == 0:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step) + block
+        return block.rstrip(b'\n').rsplit(b'\n', 1)[-1].decode()
+    
+    def _read_date_bounds(self):
+        """Dates of the first and last bar in the CSV, or None if it has no bars"""
+        _, first = self._read_header()
+        if first is None:
+            return None
+        last = self._read_last_line()
+        return tuple(pd.Timestamp(line.split(',', 1)[0]) for line in (first, last))
+    
+    def _count_bars(self):
+        """Number of bar lines in the CSV"""
+        with open(self.data_path) as f:
+            return sum(1 for line in f if line.strip() and self._is_bar(line))
+    
+    def _format_rows(self, data, header):
+        """Render bars as CSV lines in the column order of the file header"""
+        columns = header[0].split(',')[1:]
+        return data.reindex(columns=columns).to_csv(header=False).splitlines()
+    
+    def _append_rows(self, data):
+        """Append bars to the end of the CSV without rewriting it"""
+        header, _ = self._read_header()
+        with open(self.data_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            needs_newline = False
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        
+        with open(self.data_path, 'a') as f:
+            if needs_newline:
+                f.write('\n')
+            f.write('\n'.join(self._format_rows(data, header)) + '\n')
+    
+    def _prepend_rows(self, data):
+        """Insert bars before the first bar of the CSV"""
+        with open(self.data_path) as f:
+            lines = f.read().splitlines()
+        first_bar = next((i for i, line in enumerate(lines) if i and self._is_bar(line)), len(lines))
+        header, rows = lines[:first_bar], lines[first_bar:]
+        
+        tmp_path = f"{self.data_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(header + self._format_rows(data, header) + rows) + '\n')
+        os.replace(tmp_path, self.data_path)
+    
+    @staticmethod
+    def bulk_download(tickers, start_date=START_DATE, end_date=END_DATE, **options):
+        """Download many tickers concurrently, resuming from the last checkpoint
+        
+        options are passed to BulkDownloader (source, max_workers,
+        requests_per_second, max_retries, backoff, checkpoint_path).
+        """
+        return BulkDownloader(**options).download(tickers, start_date, end_date)
+    
+    def load_data(self, refresh=False):
+        """Load historical data from CSV
+        
+        With refresh=True the bars missing from the configured date range
+        are fetched first (see refresh_data); by default the file is loaded
+        as it is, without touching the network.
+        """
         if not os.path.exists(self.data_path):
             print("Data file not found. Downloading data...")
             return self.download_data()
         
+        # Bring the file up to the configured date range
+        if refresh:
+            self.refresh_data()
+        
+        data = self._load_cache()
+        if data is not None:
+            return data
+        
         print(f"Loading data from {self.data_path}...")
-        data = pd.read_csv(self.data_path, index_col=0, parse_dates=True)
+        data = self.read_csv(self.data_path)
+        self._write_cache(data)
+        
+        return data
+    
+    @staticmethod
+    def read_csv(path):
+        """Parse a price CSV, including the extra header rows written by yfinance"""
+        return DataLoader._parse_bars(pd.read_csv(path, index_col=0))
+    
+    @staticmethod
+    def iter_csv(path, chunk_size=CHUNK_SIZE):
+        """Parse a price CSV in blocks of chunk_size rows, for files too large to load at once"""
+        with pd.read_csv(path, index_col=0, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                chunk = DataLoader._parse_bars(chunk)
+                if len(chunk):
+                    yield chunk
+    
+    @staticmethod
+    def _parse_bars(data):
+        """Keep the rows of a raw price frame that are bars, with a date index and float columns"""
+        # Rows such as 'Ticker' and 'Date' carry no bar and do not parse as dates
+        dates = pd.to_datetime(data.index, errors='coerce', format='ISO8601')
+        data = data[~dates.isna()]
+        data.index = dates[~dates.isna()]
+        data.index.name = 'Date'
         
         # Ensure all columns are numeric
-        for col in data.columns:
-            data[col] = pd.to_numeric(data[col], errors='coerce')
+        return data.apply(pd.to_numeric, errors='coerce').astype(float)
+    
+    def _source_hash(self):
+        """Hash the contents of the source CSV"""
+        digest = hashlib.sha1()
+        with open(self.data_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _load_cache(self):
+        """Load the binary cache if it still matches the source CSV"""
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return None
+        
+        with np.load(self.cache_path, allow_pickle=False) as cache:
+            stat = os.stat(self.data_path)
+            unchanged = (int(cache['source_mtime_ns']) == stat.st_mtime_ns
+                         and int(cache['source_size']) == stat.st_size)
             
-        return data
\ No newline at end of file
+            # A new mtime alone does not invalidate the cache if the contents are the same
+            if not unchanged and str(cache['source_hash']) != self._source_hash():
+                return None
+            
+            index = pd.DatetimeIndex(cache['index'], name='Date')
+            if str(cache['tz']):
+                index = index.tz_localize('UTC').tz_convert(str(cache['tz']))
+            data = pd.DataFrame(cache['values'], index=index, columns=list(cache['columns']))
+        
+        if not unchanged:
+            self._write_cache(data)
+        
+        return data
+    
+    def _write_cache(self, data):
+        """Store the parsed data as raw NumPy arrays next to the source metadata"""
+        if self.cache_path is None:
+            return
+        
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        stat = os.stat(self.data_path)
+        index = data.index
+        tz = str(index.tz) if index.tz is not None else ''
+        if tz:
+            index = index.tz_convert('UTC').tz_localize(None)
+        
+        # Write to a temporary file first so readers never see a partial cache
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                index=index.values,
+                values=data.to_numpy(dtype=float),
+                columns=np.array([str(col) for col in data.columns]),
+                tz=np.array(tz),
+                source_mtime_ns=np.array(stat.st_mtime_ns),
+                source_size=np.array(stat.st_size),
+                source_hash=np.array(self._source_hash())
+            )
+        os.replace(tmp_path, self.cache_path)
\ No newline at end of file
@@ -0,0 +1,160 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DATE_DTYPE = np.dtype('datetime64[ns]')
+VALUE_DTYPE = np.dtype('float64')
+
+class TickerView:
+    """Zero-copy, DataFrame-like view of one ticker's bars in an OHLCVStore
+    
+    Supports the parts of the DataFrame interface the strategies and the
+    backtester use: columns, index, len() and column access by name.
+    """
+    
+    def __init__(self, ticker, dates, columns):
+        self.ticker = ticker
+        self.index = pd.DatetimeIndex(dates, name='Date', copy=False)
+        self.columns = pd.Index(list(columns))
+        self._arrays = columns
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def __getitem__(self, column):
+        return pd.Series(self._arrays[column], index=self.index, name=column, copy=False)
+    
+    def __contains__(self, column):
+        return column in self._arrays
+    
+    def to_frame(self):
+        """Copy the view into an in-memory DataFrame"""
+        return pd.DataFrame({column: np.array(values) for column, values in self._arrays.items()}, index=self.index.copy())
+
+class OHLCVStore:
+    """On-disk OHLCV bars of many tickers in fixed-dtype, memory-mapped arrays
+    
+    Every column is a flat binary file holding the bars of all tickers back
+    to back; index.json maps each ticker to its (offset, length) in those
+    files. Tickers are appended one at a time, so the universe never has to
+    be in memory at once.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.tickers = {}
+        self.rows = 0
+        self._arrays = None
+        
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                meta = json.load(f)
+            self.tickers = {ticker: tuple(span) for ticker, span in meta['tickers'].items()}
+            self.rows = meta['rows']
+    
+    def _path(self, column):
+        return os.path.join(self.directory, f"{column}.bin")
+    
+    def __contains__(self, ticker):
+        return ticker in self.tickers
+    
+    def __len__(self):
+        return len(self.tickers)
+    
+    def append(self, ticker, data):
+        """Append the bars of one ticker to the store"""
+        if ticker in self.tickers:
+            raise ValueError(f"Ticker {ticker} is already in the store")
+        
+        missing = [column for column in OHLCV_COLUMNS if column not in data.columns]
+        if missing:
+            raise ValueError(f"Data for {ticker} is missing columns: {missing}")
+        
+        data = data.sort_index()
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        
+        # Convert everything first so a bad column cannot leave some files longer than others
+        columns = {'Date': index.values.astype(DATE_DTYPE)}
+        for column in OHLCV_COLUMNS:
+            columns[column] = data[column].to_numpy(dtype=VALUE_DTYPE)
+        
+        os.makedirs(self.directory, exist_ok=True)
+        for column, values in columns.items():
+            self._append_column(column, values)
+        
+        self.tickers[ticker] = (self.rows, len(data))
+        self.rows += len(data)
+        self._arrays = None
+        self._write_index()
+    
+    def _append_column(self, column, values):
+        """Write values after the indexed rows of a column file
+        
+        Bytes past the rows in the index, left by an append that was
+        interrupted before the index was written, are cut off first.
+        """
+        size = self.rows * values.dtype.itemsize
+        with open(self._path(column), 'ab') as f:
+            if f.tell() < size:
+                raise ValueError(f"{self._path(column)} holds fewer than the {self.rows} indexed rows")
+            f.truncate(size)
+            f.write(values.tobytes())
+    
+    def extend(self, frames):
+        """Append several tickers from a mapping or an iterable of (ticker, data) pairs"""
+        items = frames.items() if isinstance(frames, dict) else frames
+        for ticker, data in items:
+            self.append(ticker, data)
+    
+    def _write_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'columns': OHLCV_COLUMNS,
+                'rows': self.rows,
+                'tickers': {ticker: list(span) for ticker, span in self.tickers.items()}
+            }, f)
+        os.replace(tmp_path, self.index_path)
+    
+    def _memmaps(self):
+        """Open (or reuse) read-only memory maps of every column"""
+        if self._arrays is None:
+            self._arrays = {'Date': np.memmap(self._path('Date'), dtype=DATE_DTYPE, mode='r', shape=(self.rows,))}
+            for column in OHLCV_COLUMNS:
+                self._arrays[column] = np.memmap(self._path(column), dtype=VALUE_DTYPE, mode='r', shape=(self.rows,))
+        return self._arrays
+    
+    def get(self, ticker, start=None, end=None):
+        """Return a zero-copy view of a ticker's bars between start and end (inclusive)"""
+        offset, length = self.tickers[ticker]
+        arrays = self._memmaps()
+        dates = arrays['Date'][offset:offset + length]
+        
+        # Dates are sorted per ticker, so the range is a contiguous slice
+        first = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        last = length if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        
+        columns = {column: arrays[column][offset + first:offset + last] for column in OHLCV_COLUMNS}
+        return TickerView(ticker, dates[first:last], columns)
+
+# Test the store
+if __name__ == "__main__":
+    import tempfile
+    from data.data_loader import DataLoader
+    
+    with tempfile.TemporaryDirectory() as directory:
+        store = OHLCVStore(directory)
+        store.append('MSFT', DataLoader('MSFT').load_data())
+        
+        view = store.get('MSFT', '2021-01-01', '2021-12-31')
+        print(f"{len(view)} bars for {view.ticker} from {view.index[0]} to {view.index[-1]}")
+        print(view['Close'].head())
@@ -0,0 +1,122 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pandas.tseries.frequencies import to_offset
+
+from strategies.indicator_cache import IndicatorCache
+
+# How each OHLCV column combines into a higher timeframe, other columns keep the last value
+AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'adj close': 'last',
+    'volume': 'sum'
+}
+
+DAY_NANOS = 24 * 60 * 60 * 10 ** 9
+
+def _span(offset):
+    """Length of a fixed-size bar in nanoseconds, None for calendar rules such as weeks and months"""
+    try:
+        return offset.nanos
+    except ValueError:
+        return None
+
+def _builds_from(source, target, tz_aware=False):
+    """Whether every bar of the target rule is a union of whole bars of the source rule"""
+    source_span, target_span = _span(source), _span(target)
+    if source_span is None:
+        return False
+    if tz_aware and (target_span is None or target_span >= DAY_NANOS):
+        # Daylight saving days are not a whole number of intraday bars
+        return False
+    if target_span is None:
+        # Calendar bars start at midnight, so any source bar that tiles a day fits
+        return DAY_NANOS % source_span == 0
+    return target_span > source_span and target_span % source_span == 0
+
+def resample_bars(data, rule):
+    """Aggregate OHLCV bars into bars of a coarser rule ('1h', '1D', 'W', 'ME', ...)
+    
+    Open is the first, High the highest, Low the lowest and Close the last
+    value of each period, Volume the sum. Periods without a single source
+    bar, such as nights and weekends in intraday data, are dropped.
+    """
+    aggregations = {column: AGGREGATIONS.get(str(column).lower(), 'last') for column in data.columns}
+    resampler = data.resample(rule)
+    bars = resampler.agg(aggregations)
+    return bars[resampler.size().to_numpy() > 0]
+
+def timeframe(data, rule):
+    """Cached view of the data at a coarser rule
+    
+    Views are kept in the IndicatorCache of the base data, so they live as
+    long as the data does, and every strategy on the same view also shares
+    its indicators. A new view is aggregated from the coarsest cached view
+    it can be built from (5min -> 1h -> 1D -> W) instead of the raw bars,
+    which gives the same bars for far fewer rows. Views are shared and
+    must be treated as read-only.
+    """
+    offset = to_offset(rule)
+    cache = IndicatorCache.for_data(data)
+    
+    tz_aware = getattr(data.index, 'tz', None) is not None
+    
+    def build():
+        # Coarsest cached view whose bars tile the requested ones
+        source = data
+        source_span = 0
+        for (_, name, freqstr), view in list(cache.values.items()):
+            if name != 'timeframe':
+                continue
+            cached = to_offset(freqstr)
+            if _builds_from(cached, offset, tz_aware) and _span(cached) > source_span:
+                source, source_span = view, _span(cached)
+        return resample_bars(source, offset)
+    
+    return cache.get((None, 'timeframe', offset.freqstr), build)
+
+def timeframes(data, rules):
+    """Cached views of the data for several rules, built finest first so each can reuse the last"""
+    offsets = sorted((to_offset(rule) for rule in rules), key=lambda offset: _span(offset) or np.inf)
+    views = {offset.freqstr: timeframe(data, offset) for offset in offsets}
+    return {rule: views[to_offset(rule).freqstr] for rule in rules}
+
+# Test the resampler
+if __name__ == "__main__":
+    from strategies.moving_average_crossover import MovingAverageCrossover
+    
+    # Two years of 5-minute bars during trading hours
+    rng = np.random.default_rng(0)
+    days = pd.bdate_range('2022-01-03', periods=504)
+    index = (days.values[:, None] + pd.timedelta_range('09:30:00', '15:55:00', freq='5min').values[None, :]).ravel()
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(index))))
+    spread = np.abs(rng.normal(0, 0.001, len(index)))
+    data = pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.0005, len(index))),
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(100, 10_000, len(index)).astype(float)
+    }, index=pd.DatetimeIndex(index, name='Date'))
+    
+    rules = ['1h', '1D', 'W']
+    for attempt in ('first', 'cached'):
+        start = time.perf_counter()
+        views = timeframes(data, rules)
+        for rule, view in views.items():
+            MovingAverageCrossover(view, 10, 30).generate_signals()
+        print(f"{attempt}: {time.perf_counter() - start:.4f}s")
+    
+    for rule, view in views.items():
+        direct = resample_bars(data, rule)
+        print(f"{rule:>3}: {len(view):,} bars, same as direct aggregation: {view.equals(direct)}")
+    print(f"\n{len(data):,} 5-minute bars, view cache hits: {IndicatorCache.for_data(data).hits}")
\ No newline at end of file
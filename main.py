@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 
@@ -8,6 +7,8 @@ class Visualizations:
         
     def plot_equity_curve(self):
         """Plot portfolio equity curve"""
+        import matplotlib.pyplot as plt
+        
         portfolio_values = self.results['portfolio'].holdings['total']
         
         plt.figure(figsize=(12, 6))
@@ -21,6 +22,8 @@ class Visualizations:
     
     def plot_drawdown(self):
         """Plot portfolio drawdown"""
+        import matplotlib.pyplot as plt
+        
         portfolio_values = self.results['portfolio'].holdings['total']
         cumulative_returns = (portfolio_values / portfolio_values.iloc[0]) - 1
         peak = cumulative_returns.expanding(min_periods=1).max()
@@ -37,6 +40,8 @@ class Visualizations:
     
     def plot_signals(self):
         """Plot trading signals with price data"""
+        import matplotlib.pyplot as plt
+        
         signals = self.results['signals']
         
         plt.figure(figsize=(12, 8))
@@ -1,15 +1,14 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import matplotlib.pyplot as plt
-from scipy import stats
+import sys
+import os
 
-# Get user input
-ticker = input("Enter stock symbol (e.g., MSFT, GOOGL, TSLA): ").strip().upper()
-if not ticker:
-    ticker = "AAPL"  # Default to Apple
+# Add the backtester directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backtester'))
 
-# Configuration - now based on user input
+from kernels import execute_all_in
+
+# Configuration
 START_DATE = "2020-01-01"
 END_DATE = "2023-12-31"
 INITIAL_CAPITAL = 10000.0
@@ -28,6 +27,9 @@ class SimpleBacktester:
         """Download historical data from Yahoo Finance with better error handling"""
         print(f"Downloading data for {self.ticker} from {START_DATE} to {END_DATE}...")
         try:
+            # Imported here so the backtest logic loads without the download stack
+            import yfinance as yf
+            
             # Try using Ticker method which is more reliable
             stock = yf.Ticker(self.ticker)
             data = stock.history(start=START_DATE, end=END_DATE)
@@ -90,53 +92,19 @@ class SimpleBacktester:
         portfolio['signal'] = signals['signal']
         portfolio['positions'] = signals['positions']
         
-        # Initialize portfolio columns
-        portfolio['holdings'] = 0.0
-        portfolio['cash'] = INITIAL_CAPITAL
-        portfolio['total'] = INITIAL_CAPITAL
+        # Simulate trades: buy with the full capital, sell the whole position
+        cash, shares, total, trades = execute_all_in(
+            portfolio['price'].to_numpy(dtype=float),
+            portfolio['positions'].fillna(0).to_numpy(dtype=float),
+            INITIAL_CAPITAL,
+            COMMISSION
+        )
         
-        # Track shares owned
-        shares_owned = 0
-        
-        # Simulate trades
-        trade_count = 0
-        for i in range(len(portfolio)):
-            current_date = portfolio.index[i]
-            price = portfolio['price'].iloc[i]
-            signal = portfolio['positions'].iloc[i]
-            
-            # Skip if price is NaN
-            if pd.isna(price):
-                continue
-                
-            # Execute trade if signal indicates
-            if signal == 1:  # Buy signal
-                # Calculate how many shares we can buy
-                shares_to_buy = INITIAL_CAPITAL // price
-                if shares_to_buy > 0:
-                    cost = shares_to_buy * price * (1 + COMMISSION)
-                    
-                    # Update portfolio
-                    shares_owned += shares_to_buy
-                    portfolio.loc[current_date, 'cash'] = portfolio['cash'].iloc[i-1] - cost if i > 0 else INITIAL_CAPITAL - cost
-                    trade_count += 1
-                
-            elif signal == -1:  # Sell signal
-                if shares_owned > 0:
-                    # Sell all shares
-                    revenue = shares_owned * price * (1 - COMMISSION)
-                    
-                    # Update portfolio
-                    portfolio.loc[current_date, 'cash'] = portfolio['cash'].iloc[i-1] + revenue if i > 0 else INITIAL_CAPITAL + revenue
-                    shares_owned = 0
-                    trade_count += 1
-            else:
-                # No trade, carry forward cash
-                portfolio.loc[current_date, 'cash'] = portfolio['cash'].iloc[i-1] if i > 0 else INITIAL_CAPITAL
-            
-            # Update holdings and total value
-            portfolio.loc[current_date, 'holdings'] = shares_owned * price
-            portfolio.loc[current_date, 'total'] = portfolio.loc[current_date, 'cash'] + portfolio.loc[current_date, 'holdings']
+        # Update holdings and total value
+        portfolio['holdings'] = total - cash
+        portfolio['cash'] = cash
+        portfolio['total'] = total
+        trade_count = len(trades)
         
         print(f"Executed {trade_count} trades during backtest")
         return portfolio
@@ -226,6 +194,8 @@ class SimpleBacktester:
             return
             
         try:
+            import matplotlib.pyplot as plt
+            
             fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 10))
             
             # Plot 1: Price and moving averages
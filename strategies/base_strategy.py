@@ -1,19 +1,36 @@
 from abc import ABC, abstractmethod
 import pandas as pd
 
+from strategies.indicator_cache import IndicatorCache
+
 class Strategy(ABC):
     def __init__(self, data, parameters=None):
         self.data = data
         self.parameters = parameters or {}
         self.signals = None
-        
+        self._signals_key = None
+    
     @abstractmethod
     def generate_signals(self):
         """Generate trading signals based on strategy logic"""
         pass
     
+    @property
+    def indicators(self):
+        """Indicator cache shared by all strategies on the same data"""
+        return IndicatorCache.for_data(self.data)
+    
+    def indicator(self, column, name, window, compute):
+        """Return compute(self.data[column], window), computed once per dataset"""
+        return self.indicators.get(
+            (column, name, window),
+            lambda: compute(self.data[column], window)
+        )
+    
     def get_signals(self):
-        """Return generated signals"""
-        if self.signals is None:
+        """Return generated signals, regenerating them when the parameters or data change"""
+        key = (id(self.data), sorted(self.parameters.items()))
+        if self.signals is None or self._signals_key != key:
             self.generate_signals()
+            self._signals_key = key
         return self.signals
\ No newline at end of file
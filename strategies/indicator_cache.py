@@ -0,0 +1,66 @@
+import weakref
+from collections import OrderedDict
+
+# Indicators kept per dataset before the least recently used ones are dropped
+MAX_ENTRIES = 256
+
+class IndicatorCache:
+    """Indicators computed from one dataset, shared by every strategy using it
+    
+    There is one cache per data object, looked up with for_data and dropped
+    automatically when the data object is garbage collected. Entries are
+    keyed by (column, indicator, window), so strategies with different
+    parameters on the same data only compute the windows they do not share.
+    Cached values are shared and must be treated as read-only; call clear()
+    after modifying the data in place.
+    
+    At most maxsize entries are kept, the least recently used one is
+    dropped first, so a long parameter sweep over one dataset does not
+    hold every window it ever tried. Set maxsize to None for no bound.
+    """
+    
+    # id(data) -> (weak reference to data, cache)
+    _caches = {}
+    
+    def __init__(self, maxsize=MAX_ENTRIES):
+        self.values = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def for_data(cls, data):
+        """Return the cache attached to a data object, creating it on first use"""
+        key = id(data)
+        entry = cls._caches.get(key)
+        if entry is not None and entry[0]() is data:
+            return entry[1]
+        
+        def release(ref, key=key):
+            # Only drop the entry if it still belongs to the collected object
+            current = cls._caches.get(key)
+            if current is not None and current[0] is ref:
+                del cls._caches[key]
+        
+        cache = cls()
+        cls._caches[key] = (weakref.ref(data, release), cache)
+        return cache
+    
+    def get(self, key, compute):
+        """Return the cached value for a key, calling compute() on a miss"""
+        if key in self.values:
+            self.hits += 1
+            self.values.move_to_end(key)
+            return self.values[key]
+        
+        self.misses += 1
+        value = compute()
+        self.values[key] = value
+        if self.maxsize is not None:
+            while len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+        return value
+    
+    def clear(self):
+        """Forget every cached indicator"""
+        self.values.clear()
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+import math
 import sys
 import os
 
@@ -9,6 +10,195 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from strategies.base_strategy import Strategy
 from config import SHORT_WINDOW, LONG_WINDOW
 
+# Bars covered by one cumulative sum before it is restarted, bounding its rounding error
+ANCHOR_BARS = 4096
+
+def rolling_means(values, windows):
+    """Trailing means for several windows from cumulative sums
+    
+    Matches rolling(window, min_periods=1).mean(), skipping NaNs, within
+    floating-point tolerance. values may be 1D (bars) or 2D (bars x
+    series); the result stacks one row per window, i.e. it has shape
+    (len(windows),) + values.shape. Long series are split into blocks of
+    ANCHOR_BARS bars (at least four windows long), each with its own
+    cumulative sum started one window earlier and centered on the block
+    mean, so rounding does not grow with the length or drift of the series.
+    """
+    values = np.asarray(values, dtype=float)
+    bars = len(values)
+    means = np.empty((len(windows),) + values.shape)
+    
+    # Windows sharing a block size share the cumulative sums
+    groups = {}
+    for i, window in enumerate(windows):
+        groups.setdefault(max(ANCHOR_BARS, 4 * window), []).append(i)
+    
+    for block, rows in groups.items():
+        group = [windows[i] for i in rows]
+        if bars <= block:
+            means[rows] = _block_rolling_means(values, group)
+            continue
+        
+        lookback = max(group)
+        for start in range(0, bars, block):
+            stop = min(start + block, bars)
+            first = max(start - lookback, 0)
+            means[rows, start:stop] = _block_rolling_means(values[first:stop], group)[:, start - first:]
+    
+    return means
+
+def _block_rolling_means(values, windows):
+    """rolling_means of one block from a single cumulative-sum pass"""
+    bars = len(values)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    
+    # Center on the mean to keep cumulative-sum rounding small
+    valid_count = valid.sum(axis=0)
+    offset = np.where(valid_count > 0, filled.sum(axis=0) / np.maximum(valid_count, 1), 0.0)
+    filled = np.where(valid, filled - offset, 0.0)
+    
+    sums = np.cumsum(filled, axis=0)
+    counts = np.cumsum(valid, axis=0)
+    
+    means = np.empty((len(windows),) + values.shape)
+    window_sums = np.empty_like(sums)
+    window_counts = np.empty_like(counts)
+    for i, window in enumerate(windows):
+        head = min(window, bars)
+        window_sums[:head] = sums[:head]
+        window_counts[:head] = counts[:head]
+        np.subtract(sums[head:], sums[:bars - head], out=window_sums[head:])
+        np.subtract(counts[head:], counts[:bars - head], out=window_counts[head:])
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            np.divide(window_sums, window_counts, out=means[i])
+            means[i] += offset
+        means[i][window_counts == 0] = np.nan
+    
+    return means
+
+def crossover_signals(means, windows, pairs, start=0, stop=None):
+    """Crossover signal matrix (bars x pairs) for bars start:stop
+    
+    means holds one moving average row per entry of windows, computed over
+    the full series; slicing it here lets callers reuse one set of averages
+    for any sub-range. The warmup uses each bar's position in the full series.
+    """
+    row = {window: i for i, window in enumerate(windows)}
+    stop = means.shape[-1] if stop is None else stop
+    
+    short_rows = [row[short] for short, _ in pairs]
+    long_rows = [row[long] for _, long in pairs]
+    signal = (means[short_rows, start:stop] > means[long_rows, start:stop]).T.astype(float)
+    
+    # No signal until the short window has filled
+    warmup = np.arange(start, stop)[:, None] < np.array([short for short, _ in pairs])[None, :]
+    signal[warmup] = 0.0
+    
+    return signal
+
+class RollingMean:
+    """Mean of the last `window` values, updated in O(1) per value
+    
+    Keeps the values in a ring buffer next to a compensated running sum,
+    following the same add/remove steps as pandas' rolling mean so that the
+    results are bit-for-bit equal to rolling(window, min_periods=1).mean().
+    """
+    
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [math.nan] * window
+        self.position = 0
+        self.seen = 0
+        self.nobs = 0
+        self.sum = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.negative_count = 0
+        self.same_count = 0
+        self.previous = math.nan
+        
+    def update(self, value):
+        """Add a value, drop the one leaving the window and return the mean"""
+        # Remove the value falling out of the window
+        if self.seen >= self.window:
+            old = self.buffer[self.position]
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.compensation_remove
+                t = self.sum + y
+                self.compensation_remove = t - self.sum - y
+                self.sum = t
+                if math.copysign(1.0, old) < 0:
+                    self.negative_count -= 1
+        
+        # Add the new value, NaNs only take up a slot
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum + y
+            self.compensation_add = t - self.sum - y
+            self.sum = t
+            if math.copysign(1.0, value) < 0:
+                self.negative_count += 1
+            self.same_count = self.same_count + 1 if value == self.previous else 1
+            self.previous = value
+        
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.window
+        self.seen += 1
+        
+        return self.mean
+    
+    @property
+    def mean(self):
+        if self.nobs == 0:
+            return math.nan
+        
+        result = self.sum / self.nobs
+        if self.same_count >= self.nobs:
+            result = self.previous
+        elif self.negative_count == 0 and result < 0:
+            result = 0.0
+        elif self.negative_count == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+class CrossoverStream:
+    """Bar-by-bar moving average crossover signals with constant state per window"""
+    
+    def __init__(self, short_window, long_window):
+        self.short_window = short_window
+        self.short_mavg = RollingMean(short_window)
+        self.long_mavg = RollingMean(long_window)
+        self.bars = 0
+        self.signal = None
+        
+    def update(self, price):
+        """Consume one bar and return its row of the signals frame"""
+        short_mavg = self.short_mavg.update(price)
+        long_mavg = self.long_mavg.update(price)
+        
+        # Only signal once the short window has filled
+        signal = 1.0 if self.bars >= self.short_window and short_mavg > long_mavg else 0.0
+        positions = math.nan if self.signal is None else signal - self.signal
+        
+        self.signal = signal
+        self.bars += 1
+        
+        return {
+            'price': price,
+            'short_mavg': short_mavg,
+            'long_mavg': long_mavg,
+            'signal': signal,
+            'positions': positions
+        }
+    
+    def replay(self, prices):
+        """Feed a price series through the stream and collect the rows"""
+        return pd.DataFrame([self.update(price) for price in prices], index=prices.index)
+
 class MovingAverageCrossover(Strategy):
     def __init__(self, data, short_window=SHORT_WINDOW, long_window=LONG_WINDOW):
         parameters = {
@@ -17,30 +207,43 @@ class MovingAverageCrossover(Strategy):
         }
         super().__init__(data, parameters)
         
+    def _close_column(self):
+        """Return the name of the close price column"""
+        # Ensure we have the Close column
+        if 'Close' not in self.data.columns:    
+            # Try to find a similar column
+            return [col for col in self.data.columns if 'close' in col.lower()][0]
+        return 'Close'
+    
+    def _close_data(self):
+        """Return the close price series of the data"""
+        return self.data[self._close_column()]
+    
+    def moving_average(self, window):
+        """Simple moving average of the close, shared through the indicator cache"""
+        return self.indicator(
+            self._close_column(), 'sma', window,
+            lambda prices, window: prices.rolling(window=window, min_periods=1).mean()
+        )
+        
     def generate_signals(self):
         short_window = self.parameters['short_window']
         long_window = self.parameters['long_window']
     
-    # Ensure we have the Close column
-        if 'Close' not in self.data.columns:    
-        # Try to find a similar column
-            close_col = [col for col in self.data.columns if 'close' in col.lower()][0]
-            close_data = self.data[close_col]
-        else:
-            close_data = self.data['Close']
+        close_data = self._close_data()
     
          # Calculate moving averages
         signals = pd.DataFrame(index=self.data.index)
         signals['price'] = close_data
-        signals['short_mavg'] = close_data.rolling(window=short_window, min_periods=1).mean()
-        signals['long_mavg'] = close_data.rolling(window=long_window, min_periods=1).mean()
+        signals['short_mavg'] = self.moving_average(short_window)
+        signals['long_mavg'] = self.moving_average(long_window)
     
         # Generate signals
         signals['signal'] = 0.0
     
         # Only calculate signals where we have enough data
         if len(signals) > short_window:
-            signals['signal'].iloc[short_window:] = np.where(
+            signals.iloc[short_window:, signals.columns.get_loc('signal')] = np.where(
             signals['short_mavg'].iloc[short_window:] > signals['long_mavg'].iloc[short_window:], 
             1.0, 
             0.0
@@ -50,4 +253,62 @@ class MovingAverageCrossover(Strategy):
         signals['positions'] = signals['signal'].diff()
     
         self.signals = signals
-        return signals
\ No newline at end of file
+        return signals
+    
+    def stream(self, history=None):
+        """Create a streaming signal generator, optionally primed with past prices
+        
+        Replaying the full price history through the stream reproduces
+        generate_signals exactly.
+        """
+        stream = CrossoverStream(self.parameters['short_window'], self.parameters['long_window'])
+        if history is not None:
+            for price in history:
+                stream.update(price)
+        return stream
+    
+    def batch_moving_averages(self, windows):
+        """Compute the moving averages of all windows as one (windows x bars) array"""
+        return rolling_means(self._close_data().values, list(windows))
+    
+    def generate_signal_grid(self, short_windows, long_windows):
+        """Generate crossover signals for every (short, long) window pair at once
+        
+        Each distinct window is averaged once. 'signal' and 'positions' are
+        (bars x pairs) matrices whose columns follow 'pairs' and equal the
+        columns generate_signals would produce for that pair.
+        """
+        pairs = [(short, long) for short in short_windows for long in long_windows]
+        windows = sorted({window for pair in pairs for window in pair})
+        
+        close_data = self._close_data()
+        means = self.batch_moving_averages(windows)
+        signal = crossover_signals(means, windows, pairs)
+        
+        positions = np.empty_like(signal)
+        if len(positions):
+            positions[0] = np.nan
+            positions[1:] = np.diff(signal, axis=0)
+        
+        return {
+            'index': close_data.index,
+            'price': close_data.values,
+            'pairs': pairs,
+            'signal': signal,
+            'positions': positions
+        }
+
+# Test the moving averages against pandas
+if __name__ == "__main__":
+    # A long, strongly trending series with gaps, the worst case for cumulative sums
+    rng = np.random.default_rng(0)
+    close = 1e6 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, 1_000_000)))
+    close[rng.integers(0, len(close), 1000)] = np.nan
+    windows = [5, 50, 200, 5000]
+    
+    means = rolling_means(close, windows)
+    for window, mean in zip(windows, means):
+        expected = pd.Series(close).rolling(window, min_periods=1).mean().to_numpy()
+        error = np.nanmax(np.abs(mean - expected) / np.abs(expected))
+        print(f"window {window:>5}: max relative error {error:.1e}, "
+              f"within tolerance: {np.allclose(mean, expected, rtol=1e-9, equal_nan=True)}")
\ No newline at end of file
@@ -1,82 +1,298 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
 import numpy as np
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Lines longer than this are downsampled before plotting, a few thousand points fill any figure
+MAX_POINTS = 5000
+
+def minmax_indices(values, max_points=MAX_POINTS):
+    """Positions of about max_points values that keep the shape of a long line
+    
+    The line is split into max_points / 2 equal buckets and the minimum and
+    maximum of each bucket are kept, together with the first and last
+    value, so peaks and troughs (e.g. the deepest drawdown) survive exactly.
+    """
+    values = np.asarray(values, dtype=float)
+    count = len(values)
+    if count <= max_points:
+        return np.arange(count)
+    
+    buckets = max(max_points // 2, 1)
+    size = -(-count // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:count] = values
+    padded = padded.reshape(buckets, size)
+    
+    # NaNs never win, an all-NaN bucket just keeps its first position
+    offsets = np.arange(buckets) * size
+    lows = np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1) + offsets
+    highs = np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1) + offsets
+    
+    indices = np.concatenate([[0, count - 1], lows, highs])
+    return np.unique(indices[indices < count])
+
+def lttb_indices(values, max_points=MAX_POINTS):
+    """Positions picked by Largest-Triangle-Three-Buckets downsampling
+    
+    Keeps the value of each bucket that spans the largest triangle with the
+    point kept in the previous bucket and the mean of the next one, which
+    follows the visual shape more closely than min/max but may clip
+    single-bar spikes.
+    """
+    values = np.asarray(values, dtype=float)
+    count = len(values)
+    if count <= max_points or max_points < 3:
+        return np.arange(count)
+    
+    edges = np.linspace(1, count - 1, max_points - 1).astype(int)
+    positions = np.arange(count, dtype=float)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = count - 1
+    
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = positions[stop:next_stop].mean()
+        next_y = np.nanmean(values[stop:next_stop]) if np.any(~np.isnan(values[stop:next_stop])) else 0.0
+        
+        # Twice the triangle area, the constant factor does not change the winner
+        areas = np.abs(
+            (positions[previous] - next_x) * (values[start:stop] - values[previous])
+            - (positions[previous] - positions[start:stop]) * (next_y - values[previous])
+        )
+        areas = np.where(np.isnan(areas), -1.0, areas)
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+    
+    return indices
+
+DOWNSAMPLERS = {'minmax': minmax_indices, 'lttb': lttb_indices}
+
+def downsample(series, max_points=MAX_POINTS, method='minmax'):
+    """Subset of a Series for plotting, see minmax_indices and lttb_indices"""
+    if max_points is None or len(series) <= max_points:
+        return series
+    return series.iloc[DOWNSAMPLERS[method](series.to_numpy(), max_points)]
+
+def step_points(series):
+    """Points of a step line (drawstyle='steps-post') where the value changes, plus the ends"""
+    values = series.to_numpy()
+    if len(values) <= 2:
+        return series
+    changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+    return series.iloc[np.unique(np.concatenate([[0], changes, [len(values) - 1]]))]
+
 class Visualizations:
-    def __init__(self, backtest_results):
+    """Equity, drawdown and signal plots of a backtest
+    
+    backtest_results is the dict returned by Backtester.run_backtest, or a
+    reduced dict with 'equity' and 'drawdown' Series instead of the
+    portfolio and performance objects. Lines longer than max_points are
+    downsampled (see downsample). With output_dir set the figures are
+    rendered headless, without pyplot or a GUI backend, and written to
+    <output_dir>/<name>_<plot>.<format>; otherwise they are shown with
+    pyplot, which is only imported then.
+    """
+    
+    def __init__(self, backtest_results, output_dir=None, name='backtest', format='png',
+                 max_points=MAX_POINTS, method='minmax'):
         self.results = backtest_results
+        self.output_dir = output_dir
+        self.name = name
+        self.format = format
+        self.max_points = max_points
+        self.method = method
+    
+    def equity(self):
+        """Portfolio value of every bar"""
+        if 'equity' in self.results:
+            return self.results['equity']
+        return self.results['portfolio'].holdings['total']
+    
+    def drawdown(self):
+        """Drawdown series, reusing the one computed by the backtest's PerformanceMetrics
         
+        Measured on wealth, (value - peak) / peak, the same definition as
+        the max_drawdown metric.
+        """
+        if 'drawdown' in self.results:
+            return self.results['drawdown']
+        performance = self.results.get('performance')
+        if hasattr(performance, 'drawdown'):
+            return performance.drawdown()
+        
+        portfolio_values = self.equity()
+        return portfolio_values / np.maximum.accumulate(portfolio_values.to_numpy()) - 1
+    
+    def _figure(self, figsize):
+        """New figure, detached from pyplot in headless mode"""
+        if self.output_dir is not None:
+            from matplotlib.figure import Figure
+            return Figure(figsize=figsize)
+        
+        import matplotlib.pyplot as plt
+        return plt.figure(figsize=figsize)
+    
+    def _finish(self, figure, plot):
+        """Write the figure in headless mode and return its path, otherwise show it"""
+        if self.output_dir is None:
+            import matplotlib.pyplot as plt
+            plt.show()
+            return None
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"{self.name}_{plot}.{self.format}")
+        figure.savefig(path)
+        return path
+    
+    def _line(self, series):
+        return downsample(series, self.max_points, self.method)
+    
     def plot_equity_curve(self):
         """Plot portfolio equity curve"""
-        portfolio_values = self.results['portfolio'].holdings['total']
+        portfolio_values = self._line(self.equity())
         
-        plt.figure(figsize=(12, 6))
-        plt.plot(portfolio_values.index, portfolio_values, label='Portfolio Value', color='blue')
-        plt.title('Portfolio Equity Curve')
-        plt.xlabel('Date')
-        plt.ylabel('Portfolio Value ($)')
-        plt.legend()
-        plt.grid(True)
-        plt.show()
+        figure = self._figure((12, 6))
+        ax = figure.add_subplot()
+        ax.plot(portfolio_values.index, portfolio_values, label='Portfolio Value', color='blue')
+        ax.set_title('Portfolio Equity Curve')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Portfolio Value ($)')
+        ax.legend()
+        ax.grid(True)
+        return self._finish(figure, 'equity')
     
     def plot_drawdown(self):
         """Plot portfolio drawdown"""
-        portfolio_values = self.results['portfolio'].holdings['total']
-        cumulative_returns = (portfolio_values / portfolio_values.iloc[0]) - 1
-        peak = cumulative_returns.expanding(min_periods=1).max()
-        drawdown = (cumulative_returns - peak) / peak
+        drawdown = self._line(self.drawdown())
         
-        plt.figure(figsize=(12, 6))
-        plt.fill_between(drawdown.index, drawdown * 100, 0, alpha=0.3, color='red')
-        plt.plot(drawdown.index, drawdown * 100, color='red', alpha=0.8, linewidth=1)
-        plt.title('Portfolio Drawdown')
-        plt.xlabel('Date')
-        plt.ylabel('Drawdown (%)')
-        plt.grid(True)
-        plt.show()
+        figure = self._figure((12, 6))
+        ax = figure.add_subplot()
+        ax.fill_between(drawdown.index, drawdown * 100, 0, alpha=0.3, color='red')
+        ax.plot(drawdown.index, drawdown * 100, color='red', alpha=0.8, linewidth=1)
+        ax.set_title('Portfolio Drawdown')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Drawdown (%)')
+        ax.grid(True)
+        return self._finish(figure, 'drawdown')
     
     def plot_signals(self):
         """Plot trading signals with price data"""
         signals = self.results['signals']
+        strategy = self.results.get('strategy')
+        parameters = strategy.parameters if strategy is not None else self.results.get('parameters', {})
         
-        plt.figure(figsize=(12, 8))
+        figure = self._figure((12, 8))
         
         # Plot price and moving averages
-        plt.subplot(2, 1, 1)
-        plt.plot(signals.index, signals['price'], label='Price', color='black')
+        ax = figure.add_subplot(2, 1, 1)
+        price = self._line(signals['price'])
+        ax.plot(price.index, price, label='Price', color='black')
         if 'short_mavg' in signals.columns:
-            plt.plot(signals.index, signals['short_mavg'], label=f"Short MA ({self.results['strategy'].parameters.get('short_window', 50)} days)", alpha=0.75)
+            short_mavg = self._line(signals['short_mavg'])
+            ax.plot(short_mavg.index, short_mavg, label=f"Short MA ({parameters.get('short_window', 50)} days)", alpha=0.75)
         if 'long_mavg' in signals.columns:
-            plt.plot(signals.index, signals['long_mavg'], label=f"Long MA ({self.results['strategy'].parameters.get('long_window', 200)} days)", alpha=0.75)
+            long_mavg = self._line(signals['long_mavg'])
+            ax.plot(long_mavg.index, long_mavg, label=f"Long MA ({parameters.get('long_window', 200)} days)", alpha=0.75)
         
         # Plot buy and sell signals
         buy_signals = signals[signals['positions'] > 0]
         sell_signals = signals[signals['positions'] < 0]
         
         if not buy_signals.empty:
-            plt.scatter(buy_signals.index, buy_signals['price'], color='green', marker='^', label='Buy', alpha=1, s=100)
+            ax.scatter(buy_signals.index, buy_signals['price'], color='green', marker='^', label='Buy', alpha=1, s=100)
         if not sell_signals.empty:
-            plt.scatter(sell_signals.index, sell_signals['price'], color='red', marker='v', label='Sell', alpha=1, s=100)
-            
-        plt.title('Price, Moving Averages, and Trading Signals')
-        plt.ylabel('Price ($)')
-        plt.legend()
-        plt.grid(True)
+            ax.scatter(sell_signals.index, sell_signals['price'], color='red', marker='v', label='Sell', alpha=1, s=100)
+        
+        ax.set_title('Price, Moving Averages, and Trading Signals')
+        ax.set_ylabel('Price ($)')
+        ax.legend()
+        ax.grid(True)
         
-        # Plot signal values
-        plt.subplot(2, 1, 2)
-        plt.plot(signals.index, signals['signal'], label='Signal', drawstyle='steps-post', color='purple')
-        plt.title('Trading Signal Over Time')
-        plt.xlabel('Date')
-        plt.ylabel('Signal (1=Buy, 0=Sell)')
-        plt.legend()
-        plt.grid(True)
+        # Plot signal values, a step line only needs the bars where it changes
+        ax = figure.add_subplot(2, 1, 2)
+        signal = step_points(signals['signal'])
+        ax.plot(signal.index, signal, label='Signal', drawstyle='steps-post', color='purple')
+        ax.set_title('Trading Signal Over Time')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Signal (1=Buy, 0=Sell)')
+        ax.legend()
+        ax.grid(True)
         
-        plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        figure.tight_layout()
+        return self._finish(figure, 'signals')
+    
+    def plot_all(self):
+        """Draw every plot, returning the written paths in headless mode"""
+        return [self.plot_equity_curve(), self.plot_drawdown(), self.plot_signals()]
+
+def report_data(backtest_results):
+    """The parts of a backtest result the plots need, cheap to send to a worker process"""
+    visualizations = Visualizations(backtest_results)
+    columns = ['price', 'short_mavg', 'long_mavg', 'signal', 'positions']
+    signals = backtest_results['signals']
+    strategy = backtest_results.get('strategy')
+    return {
+        'equity': visualizations.equity(),
+        'drawdown': visualizations.drawdown(),
+        'signals': signals[[column for column in columns if column in signals.columns]],
+        'parameters': strategy.parameters if strategy is not None else backtest_results.get('parameters', {})
+    }
+
+def _render_in_worker(task):
+    """Render the plots of one backtest in a worker process"""
+    name, data, options = task
+    return name, Visualizations(data, name=name, **options).plot_all()
+
+def render_reports(results, output_dir, format='png', max_points=MAX_POINTS, method='minmax', n_jobs=None):
+    """Write the plots of many backtests to files, rendered in parallel worker processes
+    
+    results maps a report name to the dict returned by run_backtest. Each
+    worker receives only the series it plots (see report_data). With
+    n_jobs=1 everything is rendered in this process; None uses all cores.
+    Returns a dict of report name -> written paths.
+    """
+    options = {'output_dir': output_dir, 'format': format, 'max_points': max_points, 'method': method}
+    tasks = [(name, report_data(backtest_results), options) for name, backtest_results in results.items()]
+    
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(tasks))
+    
+    if n_jobs <= 1:
+        return dict(_render_in_worker(task) for task in tasks)
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        return dict(executor.map(_render_in_worker, tasks))
+
+# Render reports for several parameter sets without a display
+if __name__ == "__main__":
+    import tempfile
+    import time
+    sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backtester'))
+    from backtester import Backtester
+    from strategies.moving_average_crossover import MovingAverageCrossover
+    
+    # One million random-walk bars
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2000-01-03', periods=1_000_000, freq='min', name='Date')
+    data = pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(index))))}, index=index)
+    
+    results = {}
+    for short_window, long_window in [(50, 200), (100, 400), (200, 800), (500, 2000)]:
+        strategy = MovingAverageCrossover(data, short_window, long_window)
+        backtest_results = Backtester(data, strategy).run_backtest()
+        backtest_results['strategy'] = strategy
+        results[f"ma_{short_window}_{long_window}"] = backtest_results
+    
+    start = time.perf_counter()
+    paths = render_reports(results, tempfile.mkdtemp(prefix='plots_'))
+    print(f"Rendered {sum(len(files) for files in paths.values())} plots in {time.perf_counter() - start:.2f}s")
+    for name, files in paths.items():
+        print(f"{name}: {', '.join(files)}")
\ No newline at end of file